@@ -0,0 +1,74 @@
+"""
+Compares the time and size of saving a report with python-docx' Document.save and with ReportBuilder.save_report
+at different compression levels.
+
+Usage: python benchmarks/save_benchmark.py [number of tests]
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+from allure_docx import ReportBuilder, ReportConfig
+
+ATTACHMENT = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), "..", "tests", "allure-results",
+    "cb7c5851-146a-42d8-ad16-25726ae87771-attachment.png",
+)
+
+
+def create_results(allure_dir, tests):
+    """
+    Creates failed test results with steps, a trace and a distinct screenshot each.
+    """
+    with open(ATTACHMENT, "rb") as file:
+        image = file.read()
+    for i in range(tests):
+        test_uuid = str(uuid.uuid4())
+        source = f"{test_uuid}-attachment.png"
+        with open(os.path.join(allure_dir, source), "wb") as file:
+            file.write(image + os.urandom(16))  # bytes after the IEND chunk make each image distinct
+        result = {
+            "name": f"Test case {i}", "status": "failed", "uuid": test_uuid, "historyId": test_uuid,
+            "testCaseId": test_uuid, "start": 1673462593561 + i, "stop": 1673462593600 + i,
+            "description": f"Description of test case {i}.",
+            "statusDetails": {"message": "AssertionError", "trace": "Traceback ...\n" * 20},
+            "attachments": [{"name": "screenshot", "source": source, "type": "image/png"}],
+            "steps": [{"name": f"Step {j}", "status": "passed", "start": 0, "stop": 1} for j in range(10)],
+            "labels": [{"name": "suite", "value": f"suite_{i % 10}"}],
+        }
+        with open(os.path.join(allure_dir, f"{test_uuid}-result.json"), "w", encoding="utf-8") as file:
+            json.dump(result, file)
+
+
+def measure(name, save, output):
+    start = time.perf_counter()
+    save(output)
+    duration = time.perf_counter() - start
+    print(f"{name:<28} {duration:8.2f} s {os.path.getsize(output) / 1024 / 1024:10.2f} MB")
+
+
+def main():
+    tests = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    work_dir = tempfile.mkdtemp()
+    try:
+        allure_dir = os.path.join(work_dir, "allure-results")
+        os.makedirs(allure_dir)
+        create_results(allure_dir, tests)
+        report_builder = ReportBuilder(allure_dir=allure_dir, config=ReportConfig())
+        output = os.path.join(work_dir, "report.docx")
+
+        print(f"{tests} tests\n{'save path':<28} {'time':>10} {'size':>13}")
+        measure("python-docx Document.save", report_builder.document.save, output)
+        for compression in (0, 1, 6, 9):
+            report_builder.config["compression"] = compression
+            measure(f"save_report compression={compression}", report_builder.save_report, output)
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,9 +13,11 @@ setup(
     install_requires=[
         'setuptools-git~=1.2',
         'matplotlib>=3.0, < 4.0',
+        'numpy>=1.17',
         'docx2pdf~=0.1.8',
         'click',
-        'python-docx',
+        # streamed_image uses private python-docx APIs, tested with 0.8.11 and 1.x
+        'python-docx>=0.8.11, < 2.0',
     ],
     extras_require={
         'dev': ['pyinstaller'],
@@ -27,7 +29,10 @@ setup(
     include_package_data=True,
 
     entry_points={
-        'console_scripts': ['allure-docx = allure_docx.commandline:main'],
+        'console_scripts': [
+            'allure-docx = allure_docx.commandline:main',
+            'allure-docx-server = allure_docx.server:main',
+        ],
     },
     long_description=long_description,
     long_description_content_type='text/markdown',
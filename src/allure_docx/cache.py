@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from importlib import metadata
+
+from allure_docx.config import DEFAULT_TEMPLATE
+
+# files written into the allure directory by the report builder itself
+GENERATED_FILES = ("pie.png", "histogram.png", "allure-docx-index.json")
+
+
+def _hash_file(path, digest):
+    """
+    Updates the given digest with the content of the given file, read in chunks.
+    """
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+
+def hash_directory(allure_dir, content=False):
+    """
+    Returns a hash over the names, sizes and modification times (or contents, if content is True) of the files
+    in the given allure directory.
+    """
+    digest = hashlib.sha256()
+    for entry in sorted(os.scandir(allure_dir), key=lambda e: e.name):
+        if not entry.is_file() or entry.name in GENERATED_FILES:
+            continue
+        digest.update(entry.name.encode("utf-8") + b"\0")
+        if content:
+            _hash_file(entry.path, digest)
+        else:
+            stat = entry.stat()
+            digest.update(f"{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def fingerprint(allure_dir, config, content=False):
+    """
+    Returns a fingerprint of everything a report depends on: the files of the allure directory, the resolved
+    ReportConfig (including title and logo), the contents of the template and logo files, the baseline to compare
+    with and the package version.
+    """
+    try:
+        version = metadata.version("allure-docx")
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+
+    digest = hashlib.sha256()
+    digest.update(version.encode("utf-8") + b"\0")
+    digest.update(hash_directory(allure_dir, content).encode("utf-8"))
+    digest.update(json.dumps(config, sort_keys=True, default=str).encode("utf-8"))
+    for path in (config.get("template_path", DEFAULT_TEMPLATE), config.get("logo", {}).get("path")):
+        if path:
+            _hash_file(path, digest)
+    baseline = config.get("baseline")
+    if baseline:
+        if os.path.isdir(baseline):
+            digest.update(hash_directory(baseline, content).encode("utf-8"))
+        else:
+            _hash_file(baseline, digest)
+    return digest.hexdigest()
+
+
+class OutputCache:
+    """
+    Directory of previously built reports, stored by fingerprint and file extension. If the total size exceeds
+    max_size bytes, the least recently used reports are removed.
+    """
+
+    def __init__(self, cache_dir, max_size=500 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key, ext):
+        return os.path.join(self.cache_dir, f"{key}{ext}")
+
+    def get(self, key, ext, output):
+        """
+        Copies the cached report with the given fingerprint and extension to output. Returns False if there is none.
+        """
+        path = self._path(key, ext)
+        try:
+            shutil.copyfile(path, output)
+        except FileNotFoundError:
+            return False
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except FileNotFoundError:  # evicted by another process meanwhile
+            pass
+        return True
+
+    def put(self, key, ext, report):
+        """
+        Stores a copy of the given report file under the given fingerprint and extension and evicts the least
+        recently used reports if the cache grew too large.
+        """
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        shutil.copyfile(report, temp_path)
+        os.replace(temp_path, self._path(key, ext))
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used reports until the cache is not larger than max_size. Reports removed
+        meanwhile by another process sharing the cache directory are skipped.
+        """
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".tmp"):
+                continue
+            try:
+                if entry.is_file():
+                    entries.append((entry.stat(), entry.path))
+            except FileNotFoundError:
+                pass
+        entries.sort(key=lambda entry: entry[0].st_mtime)
+        total = sum(stat.st_size for stat, _ in entries)
+        for stat, path in entries:
+            if total <= self.max_size:
+                break
+            total -= stat.st_size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
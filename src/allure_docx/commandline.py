@@ -1,8 +1,14 @@
 import os
 import click
 from allure_docx.report_builder import ReportBuilder
+from allure_docx.preview import PreviewBuilder
 from allure_docx.config import ReportConfig
 from allure_docx.config import ConfigTags
+from allure_docx.watch import ReportWatcher
+from allure_docx.cache import OutputCache
+from allure_docx.cache import fingerprint
+from allure_docx.cache import hash_directory
+from allure_docx import compare
 
 
 @click.command()
@@ -30,6 +36,54 @@ from allure_docx.config import ConfigTags
     is_flag=True,
     help="Try to generate a pdf file from created docx using soffice or Word.",
 )
+@click.option(
+    "--compression",
+    default=6,
+    show_default=True,
+    type=click.IntRange(0, 9),
+    help="Deflate level of the docx file, from 0 (no compression, fastest) to 9 (smallest).",
+)
+@click.option(
+    "--compare",
+    "baseline",
+    default=None,
+    type=click.Path(exists=True, resolve_path=True),
+    help="Baseline allure_dir (or index file saved with --save-index) to list the changes against.",
+)
+@click.option(
+    "--save-index",
+    default=None,
+    type=click.Path(resolve_path=True),
+    help="Save the index of the results to this file, to be used as baseline with --compare.",
+)
+@click.option(
+    "--preview",
+    is_flag=True,
+    help="Write a fast HTML preview (Markdown if output ends with .md) linking to the attachments instead of the docx.",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep watching allure_dir and update the report whenever new results are written (stop with Ctrl+C).",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Always build the report, even if a report for the same input is cached.",
+)
+@click.option(
+    "--cache-dir",
+    default=os.path.join(os.path.expanduser("~"), ".cache", "allure-docx"),
+    envvar="ALLURE_DOCX_CACHE_DIR",
+    show_default=True,
+    help="Directory of the report cache.",
+)
+@click.option("--cache-size", default=500, show_default=True, help="Maximum size of the report cache in MB.")
+@click.option(
+    "--cache-content-hash",
+    is_flag=True,
+    help="Compare the contents of the result files instead of their sizes and modification times.",
+)
 @click.option("--title", default=None, help="Custom report title")
 @click.option("--logo", default=None, help="Path to custom report logo image")
 @click.option(
@@ -37,10 +91,11 @@ from allure_docx.config import ConfigTags
     default=None,
     help="Image width in centimeters. Width is scaled to keep aspect ratio",
 )
-def main(allure_dir, output, template, pdf, title, logo, logo_width, config_tag, config_file):
+def main(allure_dir, output, template, pdf, compression, baseline, save_index, preview, watch, no_cache, cache_dir,
+         cache_size, cache_content_hash, title, logo, logo_width, config_tag, config_file):
     """allure_dir: Path (relative or absolute) to allure_dir folder with test results
 
-    output: Path (relative or absolute) with filename for the generated docx file"""
+    output: Path (relative or absolute) with filename for the generated docx file (or preview, see --preview)"""
 
     def build_config():
         """
@@ -66,6 +121,9 @@ def main(allure_dir, output, template, pdf, title, logo, logo_width, config_tag,
                 r_config['logo']['width'] = logo_width
         if template:
             r_config['template_path'] = template
+        r_config['compression'] = compression
+        if baseline:
+            r_config['baseline'] = baseline
         if 'title' not in r_config['cover']:
             r_config['cover']['title'] = title
         return r_config
@@ -84,13 +142,44 @@ def main(allure_dir, output, template, pdf, title, logo, logo_width, config_tag,
         logo_width = float(logo_width)
 
     report_config = build_config()
+    pdf_name, ext = os.path.splitext(output)
+    pdf_name += ".pdf"
+
+    if preview:
+        if pdf or watch:
+            raise click.UsageError("--preview cannot be combined with --pdf or --watch.")
+        report_builder = PreviewBuilder(allure_dir=allure_dir, config=report_config)
+        report_builder.save_preview(output)
+        if save_index:
+            compare.save_index(report_builder.index, save_index, hash_directory(allure_dir))
+        return
+
+    if watch:
+        report_builder = ReportWatcher(allure_dir=allure_dir, output=output, config=report_config).run()
+        if pdf and report_builder is not None:
+            report_builder.save_report_to_pdf(pdf_name)
+        return
+
+    cache = None
+    if not no_cache:
+        cache = OutputCache(cache_dir, max_size=cache_size * 1024 * 1024)
+        key = fingerprint(allure_dir, report_config, content=cache_content_hash)
+        if cache.get(key, ".docx", output) and (not pdf or cache.get(key, ".pdf", pdf_name)):
+            print("Inputs did not change, report taken from cache.")
+            if save_index:
+                compare.save_index(compare.build_index(allure_dir), save_index, hash_directory(allure_dir))
+            return
+
     report_builder = ReportBuilder(allure_dir=allure_dir, config=report_config)
     report_builder.save_report(output)
+    if cache is not None:
+        cache.put(key, ".docx", output)
+    if save_index:
+        compare.save_index(report_builder.index, save_index, hash_directory(allure_dir))
 
     if pdf:
-        pdf_name, ext = os.path.splitext(output)
-        pdf_name += ".pdf"
-        report_builder.save_report_to_pdf(pdf_name)
+        if report_builder.save_report_to_pdf(pdf_name) and cache is not None:
+            cache.put(key, ".pdf", pdf_name)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+
+from allure_docx.cache import hash_directory
+
+INDEX_FILE = "allure-docx-index.json"
+INDEX_VERSION = 1
+FAILING = ("failed", "broken")
+
+
+def _message_hash(result):
+    message = result.get("statusDetails", {}).get("message")
+    if not message:
+        return None
+    return hashlib.sha1(message.encode("utf-8")).hexdigest()[:16]
+
+
+def _display_name(result, max_value_length=30):
+    """
+    Returns the name of the given result, followed by its parameters for parameterized tests, so the variants of a
+    test can be told apart.
+    """
+    parameters = result.get("parameters")
+    if not parameters:
+        return result["name"]
+    values = []
+    for parameter in parameters:
+        value = str(parameter.get("value", "")).replace("\n", " ")
+        if len(value) > max_value_length:
+            value = value[:max_value_length - 3] + "..."
+        values.append(f"{parameter.get('name', '')}={value}")
+    return f"{result['name']} [{', '.join(values)}]"
+
+
+def index_results(results):
+    """
+    Creates the index of the given results: historyId -> [name, status, duration in ms, hash of the status message].
+    The name includes the parameters of parameterized tests. Only the most recent result (by start) of each
+    historyId is kept.
+    """
+    index = {}
+    starts = {}
+    for result in results:
+        history_id = result["historyId"]
+        start = result.get("start", 0)
+        if history_id in index and starts[history_id] >= start:
+            continue
+        duration = result["stop"] - result["start"] if "start" in result and "stop" in result else None
+        index[history_id] = [_display_name(result), result["status"], duration, _message_hash(result)]
+        starts[history_id] = start
+    return index
+
+
+def build_index(allure_dir):
+    """
+    Reads all result files of the given allure directory and returns their index.
+    """
+    def iter_results():
+        for file_name in os.listdir(allure_dir):
+            if file_name.endswith("-result.json"):
+                with open(os.path.join(allure_dir, file_name), encoding="utf-8") as file:
+                    yield json.load(file)
+
+    return index_results(iter_results())
+
+
+def save_index(index, path, fingerprint=None):
+    """
+    Saves the given index as JSON file. The fingerprint identifies the allure directory the index was built from.
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"version": INDEX_VERSION, "fingerprint": fingerprint, "tests": index}, file)
+
+
+def load_index(path):
+    """
+    Loads an index saved with save_index. Returns the index and its fingerprint.
+    """
+    with open(path, encoding="utf-8") as file:
+        data = json.load(file)
+    if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+        raise ValueError(f"{path} is not an allure-docx index (version {INDEX_VERSION}).")
+    return data["tests"], data.get("fingerprint")
+
+
+def load_baseline(baseline):
+    """
+    Returns the index of the baseline, given as index file or as allure directory. For a directory, the index is
+    stored inside it (if writable) and reused as long as the result files do not change.
+    """
+    if os.path.isfile(baseline):
+        return load_index(baseline)[0]
+
+    fingerprint = hash_directory(baseline)
+    index_path = os.path.join(baseline, INDEX_FILE)
+    if os.path.isfile(index_path):
+        try:
+            index, index_fingerprint = load_index(index_path)
+        except ValueError:  # damaged or written by another version, rebuilt below
+            index_fingerprint = None
+        if index_fingerprint == fingerprint:
+            return index
+
+    index = build_index(baseline)
+    try:
+        save_index(index, index_path, fingerprint)
+    except OSError:
+        pass
+    return index
+
+
+def compare(baseline, current, regression_factor=1.5, regression_min=100):
+    """
+    Compares two indexes in one pass over each. Returns a dict of lists of (name, baseline entry, current entry):
+        new_failures: failing now, not failing in the baseline (but present)
+        fixed: failing in the baseline, passed now
+        changed_failures: failing in both with a different message
+        added / removed: only in the current run / only in the baseline
+        regressions: duration at least regression_factor times and regression_min ms longer than in the baseline
+    """
+    changes = {key: [] for key in ("new_failures", "fixed", "changed_failures", "added", "removed", "regressions")}
+    for history_id, entry in current.items():
+        old = baseline.get(history_id)
+        if old is None:
+            changes["added"].append((entry[0], None, entry))
+            continue
+        if entry[1] in FAILING and old[1] not in FAILING:
+            changes["new_failures"].append((entry[0], old, entry))
+        elif old[1] in FAILING and entry[1] == "passed":
+            changes["fixed"].append((entry[0], old, entry))
+        elif old[1] in FAILING and entry[1] in FAILING and old[3] != entry[3]:
+            changes["changed_failures"].append((entry[0], old, entry))
+        if (
+                old[2] is not None and entry[2] is not None
+                and entry[2] >= old[2] * regression_factor
+                and entry[2] - old[2] >= regression_min
+        ):
+            changes["regressions"].append((entry[0], old, entry))
+    for history_id, old in baseline.items():
+        if history_id not in current:
+            changes["removed"].append((old[0], old, None))
+
+    for entries in changes.values():
+        entries.sort(key=lambda change: change[0])
+    changes["regressions"].sort(key=lambda change: change[1][2] - change[2][2])
+    return changes
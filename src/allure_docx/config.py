@@ -4,6 +4,7 @@ from enum import Enum
 from enum import EnumMeta
 
 _config_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "config")
+DEFAULT_TEMPLATE = os.path.join(os.path.dirname(os.path.realpath(__file__)), "template.docx")
 
 
 class ConfigTagsEnumMeta(EnumMeta):
@@ -0,0 +1,283 @@
+import html
+import os
+import re
+from urllib.parse import quote
+
+from allure_docx.report_builder import (
+    CHANGE_SECTIONS, ReportBuilder, change_rows, change_summary, format_duration, group_name, group_summary,
+    group_title, list_groups,
+)
+
+
+class _HtmlWriter:
+    """
+    Writes the preview as a single HTML file, element by element.
+    """
+
+    STYLE = (
+        "body{font-family:sans-serif;max-width:60em;margin:auto;padding:1em}"
+        "table{border-collapse:collapse;margin:.5em 0}td,th{border:1px solid #ccc;padding:.2em .5em;text-align:left}"
+        "pre{background:#f4f4f4;padding:.5em;overflow-x:auto}.item{margin:.1em 0}"
+        ".failed{color:#c0392b}.broken{color:#d68910}.passed{color:#1e8449}.skipped,.unknown{color:#7f8c8d}"
+    )
+
+    def __init__(self, file):
+        self.file = file
+
+    def start(self, title):
+        self.file.write(
+            f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title>"
+            f"<style>{self.STYLE}</style></head><body>\n"
+        )
+
+    def finish(self):
+        self.file.write("</body></html>\n")
+
+    def heading(self, text, level, anchor=None, status=None):
+        attributes = f" id=\"{anchor}\"" if anchor else ""
+        attributes += f" class=\"{status}\"" if status else ""
+        self.file.write(f"<h{level}{attributes}>{html.escape(text)}</h{level}>\n")
+
+    def paragraph(self, text):
+        self.file.write(f"<p>{html.escape(text).replace(chr(10), '<br>')}</p>\n")
+
+    def code(self, text):
+        self.file.write(f"<pre>{html.escape(text)}</pre>\n")
+
+    def item(self, text, indent=0, href=None, status=None):
+        text = html.escape(text)
+        if href:
+            text = f"<a href=\"{html.escape(href)}\">{text}</a>"
+        attributes = f" class=\"item {status}\"" if status else " class=\"item\""
+        self.file.write(f"<div{attributes} style=\"margin-left:{1.5 * indent}em\">{text}</div>\n")
+
+    def table(self, header, rows):
+        self.file.write("<table>")
+        if header:
+            self.file.write("<tr>" + "".join(f"<th>{html.escape(cell)}</th>" for cell in header) + "</tr>")
+        for row in rows:
+            self.file.write("<tr>" + "".join(
+                f"<td>{html.escape(cell).replace(chr(10), '<br>')}</td>" for cell in row
+            ) + "</tr>")
+        self.file.write("</table>\n")
+
+
+class _MarkdownWriter:
+    """
+    Writes the preview as a single Markdown file, element by element.
+    """
+
+    SPECIAL = re.compile(r"([\\`*_\[\]<>#|])")
+
+    def __init__(self, file):
+        self.file = file
+
+    def _escape(self, text):
+        return self.SPECIAL.sub(r"\\\1", text)
+
+    def start(self, title):
+        self.file.write(f"# {self._escape(title)}\n\n")
+
+    def finish(self):
+        pass
+
+    def heading(self, text, level, anchor=None, status=None):
+        if anchor:
+            self.file.write(f"<a id=\"{anchor}\"></a>\n\n")
+        self.file.write(f"{'#' * level} {self._escape(text)}\n\n")
+
+    def paragraph(self, text):
+        self.file.write(self._escape(text).replace("\n", "  \n") + "\n\n")
+
+    def code(self, text):
+        fence = "`" * max(3, max((len(run) for run in re.findall("`+", text)), default=0) + 1)
+        self.file.write(f"{fence}\n{text}\n{fence}\n\n")
+
+    def item(self, text, indent=0, href=None, status=None):
+        text = self._escape(text.replace("\n", " "))
+        if href:
+            text = f"[{text}]({href.replace(' ', '%20').replace(')', '%29')})"
+        if status in ("failed", "broken"):
+            text = f"**{text}**"
+        self.file.write(f"{'  ' * indent}- {text}\n\n")
+
+    def table(self, header, rows):
+        def line(cells):
+            return "| " + " | ".join(self._escape(cell).replace("\n", "<br>") for cell in cells) + " |\n"
+
+        columns = len(header) if header else max((len(row) for row in rows), default=0)
+        self.file.write(line(header or [""] * columns) + "|" + " --- |" * columns + "\n")
+        for row in rows:
+            self.file.write(line(row))
+        self.file.write("\n")
+
+
+class PreviewBuilder(ReportBuilder):
+    """
+    Builds the same data as ReportBuilder, but writes a lightweight HTML or Markdown preview instead of the docx
+    document. The preview is streamed to the output file test by test and links to the attachments in the allure
+    directory instead of embedding them, so it is fast even for very large test runs.
+    """
+
+    def _render(self):
+        if not self.sorted_recent_results:
+            raise ImportError("No test result files were found in the given allure results folder.")
+
+    def save_preview(self, output):
+        """
+        Writes the preview to the given output path, as Markdown if the file name ends with .md and as HTML otherwise.
+        """
+        allure_dir = os.path.abspath(self.session["allure_dir"])
+        try:
+            self.attachment_prefix = quote(
+                os.path.relpath(allure_dir, os.path.dirname(os.path.abspath(output))).replace(os.sep, "/")
+            ) + "/"
+        except ValueError:  # on another drive
+            self.attachment_prefix = "file:///" + quote(allure_dir.replace(os.sep, "/").lstrip("/")) + "/"
+        with open(output, "w", encoding="utf-8", newline="\n", buffering=1024 * 1024) as file:
+            writer = _MarkdownWriter(file) if output.lower().endswith(".md") else _HtmlWriter(file)
+            self._write_preview(writer)
+
+    def _write_preview(self, writer):
+        """
+        Writes the details, the session summary, the changes since the baseline (if any) and all tests.
+        """
+        writer.start(f"Test Report: {self.config['cover']['title']}")
+        if self.config.get('details'):
+            writer.heading("Test Details", 2)
+            writer.table(None, [(name, value.strip()) for name, value in self.config['details'].items()])
+
+        writer.heading("Test Session Summary", 2)
+        writer.paragraph(
+            f"Start: {self.session['start']}\nEnd: {self.session['stop']}\nDuration: {self.session['duration']}"
+        )
+        writer.table(["Status", "Tests", "Share"], [
+            (status, str(number), self.session['results_relative'][status])
+            for status, number in self.session['results'].items()
+        ])
+
+        if self.changes is not None:
+            self._write_changes(writer)
+
+        if self.groups is not None:
+            groups = list_groups(self.groups)
+            writer.heading("Contents", 2)
+            for group, depth in groups:
+                writer.item(f"{group_name(group)} ({group['total']})", depth, href=f"#group_{group['id']}")
+            for group, depth in groups:
+                writer.heading(group_title(group), 2, anchor=f"group_{group['id']}")
+                writer.paragraph(group_summary(group))
+                for test in group["tests"]:
+                    self._write_test(writer, test)
+        else:
+            writer.heading("Tests", 2)
+            for test in self.sorted_recent_results:
+                self._write_test(writer, test)
+        writer.finish()
+
+    def _write_changes(self, writer):
+        """
+        Writes the changes since the baseline, like ReportBuilder._print_changes.
+        """
+        writer.heading("Changes since baseline", 2)
+        writer.paragraph(change_summary(self.changes))
+        for key, title in CHANGE_SECTIONS:
+            if self.changes[key]:
+                writer.heading(title, 3)
+                writer.table(["Test", "Baseline", "Current"], change_rows(self.changes, key))
+
+    def _attachment_href(self, attachment):
+        """
+        Returns the link to the given attachment, relative to the preview file if possible.
+        """
+        return self.attachment_prefix + quote(attachment["source"])
+
+    def _write_attachments(self, writer, item, indent=0):
+        """
+        Writes a link to each attachment of the given test, fixture or step.
+        """
+        for attachment in item.get("attachments", []):
+            writer.item(f"[Attachment] {attachment.get('name', '')}", indent, href=self._attachment_href(attachment))
+
+    def _write_steps(self, writer, parent_step, config_info, indent=0):
+        """
+        Writes the steps of the given step recursively, like ReportBuilder._print_steps.
+        """
+        for step in parent_step.get("steps", []):
+            writer.item(f"> {step['name']}", indent, status=step["status"])
+            if "parameters" in config_info:
+                for params in step.get("parameters", []):
+                    writer.item(f"{params['name']} = {self._format_argval(params['value'])}", indent + 1)
+            if "details" in config_info and step.get("statusDetails"):
+                if step["statusDetails"].get("message"):
+                    writer.item(step["statusDetails"]["message"], indent + 1, status=step["status"])
+                if "trace" in config_info and step["statusDetails"].get("trace"):
+                    writer.code(step["statusDetails"]["trace"])
+            if "attachments" in config_info:
+                self._write_attachments(writer, step, indent + 1)
+            self._write_steps(writer, step, config_info, indent + 1)
+
+    def _write_fixtures(self, writer, test, key, config_info):
+        """
+        Writes the befores or afters (given by key) of the containers of the given test.
+        """
+        for parent in test["parents"]:
+            for fixture in parent.get(key, []):
+                writer.item(f"[Fixture] {fixture['name']}")
+                self._write_attachments(writer, fixture, 1)
+                self._write_steps(writer, fixture, config_info, 1)
+
+    def _write_test(self, writer, test):
+        """
+        Writes the given test, honoring the info and labels configured for its status like ReportBuilder._print_test.
+        """
+        config_info = self.config["info"][test["status"]]
+        config_labels = self.config["labels"][test["status"]]
+
+        writer.heading(f"{test['name']}  [ {test['status']} ]", 3, status=test["status"])
+
+        rows = []
+        if "duration" in config_info and "start" in test and "stop" in test:
+            rows.append(("Duration", format_duration(test["stop"] - test["start"])))
+        for label_name in config_labels:
+            values = test["label_index"].get(label_name)
+            if values:
+                rows.append((label_name.capitalize(), "\n".join(values)))
+        if rows:
+            writer.table(None, rows)
+
+        if "description" in config_info:
+            writer.heading("Description", 4)
+            writer.paragraph(test.get("description") or "No description available.")
+
+        if "parameters" in config_info and test.get("parameters"):
+            writer.heading("Parameters", 4)
+            for p in test["parameters"]:
+                writer.item(f"{p['name']}: {p['value']}")
+
+        details = test.get("statusDetails") or {}
+        if "details" in config_info and (details.get("message") or "trace" in config_info and "trace" in details):
+            writer.heading("Details", 4)
+            if "message" in details:
+                writer.paragraph(details["message"])
+            if "trace" in config_info and "trace" in details:
+                writer.code(details["trace"])
+
+        if "links" in config_info and test.get("links"):
+            writer.heading("Links", 4)
+            for link in test["links"]:
+                if "name" in link and "url" in link:
+                    writer.item(link["name"], href=link["url"])
+
+        if "setup" in config_info and any(parent.get("befores") for parent in test["parents"]):
+            writer.heading("Test Setup", 4)
+            self._write_fixtures(writer, test, "befores", config_info)
+
+        if "body" in config_info and (test.get("attachments") or test.get("steps")):
+            writer.heading("Test Body", 4)
+            self._write_attachments(writer, test)
+            self._write_steps(writer, test, config_info)
+
+        if "teardown" in config_info and any(parent.get("afters") for parent in test["parents"]):
+            writer.heading("Test Teardown", 4)
+            self._write_fixtures(writer, test, "afters", config_info)
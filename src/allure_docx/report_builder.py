@@ -1,3 +1,4 @@
+import io
 import os
 import warnings
 import shutil
@@ -8,6 +9,8 @@ import matplotlib.pyplot as plt
 from os import listdir
 from os.path import join, isfile
 from time import ctime
+from itertools import count
+from collections import Counter
 from datetime import timedelta, datetime
 
 from docx.shared import Mm, Cm
@@ -15,8 +18,108 @@ from docx import Document
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.oxml.ns import qn
 from docx.oxml import OxmlElement
+from docx.text.paragraph import Paragraph
 from docx2pdf import convert
 
+from allure_docx import compare
+from allure_docx.config import DEFAULT_TEMPLATE
+from allure_docx import text_attachment
+from allure_docx.timing import PERCENTILES, TimingData
+from allure_docx.streamed_image import StreamedImages
+
+HIERARCHIES = {
+    "suites": ["parentsuite", "suite", "subsuite"],
+    "behaviors": ["epic", "feature", "story"],
+}
+STATUSES = ["passed", "skipped", "broken", "failed", "unknown"]
+CHANGE_SECTIONS = [
+    ("new_failures", "New Failures"),
+    ("fixed", "Fixed Tests"),
+    ("changed_failures", "Failures with Changed Message"),
+    ("regressions", "Duration Regressions"),
+    ("added", "Added Tests"),
+    ("removed", "Removed Tests"),
+]
+
+
+def format_duration(duration):
+    """
+    Formats the given duration in milliseconds as ms, s or min.
+    """
+    duration_unit = "ms"
+    if duration > 1000:
+        duration_unit = "s"
+        duration = duration / 1000
+        if duration > 60:
+            duration_unit = "min"
+            duration = duration / 60
+    return f"{round(duration, 3)}{duration_unit}"
+
+
+def change_summary(changes):
+    """
+    Returns the number of changes of each kind in CHANGE_SECTIONS, one line per kind.
+    """
+    return "\n".join(f"{title}: {len(changes[key])}" for key, title in CHANGE_SECTIONS)
+
+
+def change_rows(changes, key):
+    """
+    Returns the (test, baseline, current) table rows of the changes of the given kind. Baseline and current show the
+    status and duration of the test, "-" if it is missing.
+    """
+    def describe(entry):
+        if entry is None:
+            return "-"
+        if entry[2] is None:
+            return entry[1]
+        return f"{entry[1]} ({format_duration(entry[2])})"
+
+    return [(name, describe(old), describe(new)) for name, old, new in changes[key]]
+
+
+def _iter_groups(group, depth=0):
+    """
+    Yields (group, depth) for all sub groups of the given group in document order.
+    """
+    for key in sorted(group["children"], key=lambda key: (key[1], key[0])):
+        child = group["children"][key]
+        yield child, depth
+        yield from _iter_groups(child, depth + 1)
+
+
+def list_groups(root):
+    """
+    Returns (group, depth) for all groups below the given root group in document order, followed by the root group
+    itself if it holds tests without any of the hierarchy labels.
+    """
+    groups = list(_iter_groups(root))
+    if root["tests"]:
+        groups.append((root, 0))
+    return groups
+
+
+def group_name(group):
+    """
+    Returns the name of the given group in the table of contents, "Ungrouped" for the root group.
+    """
+    return group["path"][-1] if group["path"] else "Ungrouped"
+
+
+def group_title(group):
+    """
+    Returns the heading of the given group: its full path, "Ungrouped" for the root group.
+    """
+    return " / ".join(group["path"]) or group_name(group)
+
+
+def group_summary(group):
+    """
+    Returns the summary line of the results of the given group.
+    """
+    results_strs = [f"{status}: {n}" for status, n in group["results"].items() if n > 0]
+    return f"Total: {group['total']} ({', '.join(results_strs)})"
+
 
 class ReportBuilder:
     """
@@ -28,13 +131,14 @@ class ReportBuilder:
         self.config = config
         self.config['allure_dir'] = allure_dir
         if 'template_path' not in self.config:
-            self.config['template_path'] = os.path.join(os.path.dirname(os.path.realpath(__file__)), "template.docx")
-        self.document = Document(config['template_path'])
+            self.config['template_path'] = DEFAULT_TEMPLATE
+        self.document = None
+        self.streamed_images = None
 
         self.session = {
             "allure_dir": config['allure_dir'],
-            "start": 0,
-            "stop": 0,
+            "start": None,
+            "stop": None,
             "results": {
                 "passed": 0,
                 "skipped": 0,
@@ -53,22 +157,44 @@ class ReportBuilder:
         }
 
         self.sorted_recent_results = None
+        self.groups = None
+        self.timing = TimingData()
+        self.index = None
+        self.changes = None
         self._build_data()
+        self._render()
+
+    def _render(self):
+        """
+        Creates the docx document from the built data.
+        """
+        self.document = self._load_template()
+        self.streamed_images = StreamedImages(self.document)
         self._create_pie_chart()
         self._print_report()
 
+    def _load_template(self):
+        """
+        Creates the document from the template file given in the config.
+        """
+        return Document(self.config['template_path'])
+
     def save_report(self, output):
         """
-        Save report to given output path as docx.
+        Save report to given output path as docx. Attachment images are streamed from the allure directory.
+        The deflate level of the docx file can be set with "compression" in the config (0-9, 0 for no compression).
         """
-        self.document.save(output)
+        self.streamed_images.save(output, compression=int(self.config.get('compression', 6)))
 
     def save_report_to_pdf(self, output):
         """
-        Save report to given output path as pdf. Tries officetopdf or soffice.
+        Save report to given output path as pdf. Tries officetopdf or soffice. Returns whether the pdf was created;
+        an existing file at output is removed first, so it is never mistaken for the new pdf.
         """
 
         soffice = shutil.which("soffice")
+        if os.path.isfile(output):
+            os.remove(output)
 
         temp_docx_filename = f"{os.path.dirname(output)}/__temp.docx"
         temp_pdf_filename = f"{os.path.dirname(output)}/__temp.pdf"
@@ -80,11 +206,13 @@ class ReportBuilder:
             if soffice is not None:
                 result_dir = os.path.dirname(output)
                 subprocess.call(["soffice", "--convert-to", "pdf", "--outdir", result_dir, temp_docx_filename])
-                os.rename(temp_pdf_filename, output)
+                if os.path.isfile(temp_pdf_filename):
+                    os.rename(temp_pdf_filename, output)
             else:
                 print("Could not find neither find Word nor soffice (LibreOffice). Not generating PDF.")
 
         os.remove(temp_docx_filename)
+        return os.path.isfile(output)
 
     def _process_steps(self, node):
         """
@@ -110,15 +238,11 @@ class ReportBuilder:
             for step in node["steps"]:
                 self._process_steps(step)
 
-    def _build_data(self):
+    def _read_data(self):
         """
-        Build the session dict and the sorted_reuslts dict from the given allure directory.
+        Reads all result and container files from the given allure directory. Returns a tuple of the list of results
+        and the list of containers.
         """
-
-        def get_sorting_key(d):
-            classification = {"broken": 0, "failed": 1, "skipped": 2, "passed": 3}
-            return f"{classification[d['status']]}-{d['name']}"
-
         allure_dir = self.config['allure_dir']
 
         json_results = [f for f in listdir(allure_dir) if isfile(join(allure_dir, f)) and "result" in f]
@@ -130,20 +254,49 @@ class ReportBuilder:
                 container = json.load(file)
                 data_containers.append(container)
 
-        data_results_dict = {}
-        for file_name in json_results:  # one array of results per test historyId
+        data_results = []
+        for file_name in json_results:
             with open(join(allure_dir, file_name), encoding="utf-8") as file:
-                result = json.load(file)
-                history_id = result['historyId']
-                if history_id not in data_results_dict:
-                    data_results_dict[history_id] = []
-                data_results_dict[history_id].append(result)
+                data_results.append(json.load(file))
+        return data_results, data_containers
+
+    def _build_data(self):
+        """
+        Build the session dict and the sorted_reuslts dict from the given allure directory.
+        """
+
+        def get_sorting_key(d):
+            classification = {"broken": 0, "failed": 1, "skipped": 2, "passed": 3}
+            return f"{classification[d['status']]}-{d['name']}"
+
+        data_results, data_containers = self._read_data()
+        self.index = compare.index_results(data_results)
+        if self.config.get('baseline'):
+            compare_config = self.config.get('compare', {})
+            self.changes = compare.compare(
+                self._load_baseline(),
+                self.index,
+                regression_factor=float(compare_config.get('regression_factor', 1.5)),
+                regression_min=float(compare_config.get('regression_min', 100)),
+            )
+
+        data_results_dict = {}
+        for result in data_results:  # one array of results per test historyId
+            history_id = result['historyId']
+            if history_id not in data_results_dict:
+                data_results_dict[history_id] = []
+            data_results_dict[history_id].append(result)
         history_data_results = list(data_results_dict.items())  # can be used in a later version to implement history
         for tests in history_data_results:
             tests[1].sort(key=lambda x: x["start"], reverse=True)
         recent_results = [results[1][0] for results in history_data_results]  # get only the most recent results
         id_sorted_recent_results = sorted(recent_results, key=lambda x: x["testCaseId"])
 
+        containers_by_child = {}
+        for container in data_containers:
+            for child in dict.fromkeys(container.get("children", [])):
+                containers_by_child.setdefault(child, []).append(container)
+
         idx = -1
         param_idx = 1
         for result in id_sorted_recent_results:
@@ -157,25 +310,23 @@ class ReportBuilder:
                 else:
                     param_idx = 1
 
-            self.sorted_recent_results = sorted(id_sorted_recent_results, key=get_sorting_key)
-
+            result["label_index"] = self._index_labels(result)
             self._process_steps(result)
             self.session["total"] += 1
             self.session["results"][result["status"]] += 1
 
-            result["parents"] = []
-            for container in data_containers:
-                if "children" not in container:
-                    continue
-                if result["uuid"] not in container["children"]:
-                    continue
-                result["parents"].append(container)
+            result["parents"] = containers_by_child.get(result["uuid"], [])
+            for container in result["parents"]:
                 if "befores" in container:
                     for before in container["befores"]:
                         self._process_steps(before)
                 if "afters" in container:
                     for after in container["afters"]:
                         self._process_steps(after)
+            self.timing.add(result, result["label_index"].get("suite", ["(no suite)"])[0])
+
+        self.sorted_recent_results = sorted(id_sorted_recent_results, key=get_sorting_key)
+        self.groups = self._build_groups()
 
         if self.session["total"] == 0:
             warnings.warn("No test result files were found!")
@@ -196,11 +347,90 @@ class ReportBuilder:
             else:
                 self.session["results_relative"][item] = "Not available"
 
+    def _load_baseline(self):
+        """
+        Returns the index of the baseline given with "baseline" in the config.
+        """
+        return compare.load_baseline(self.config['baseline'])
+
+    @staticmethod
+    def _index_labels(result):
+        """
+        Creates a dict mapping each lower case label name of the given result to the list of its values.
+        """
+        label_index = {}
+        for label in result.get("labels", []):
+            label_index.setdefault(label["name"].lower(), []).append(label["value"])
+        return label_index
+
+    def _get_hierarchy(self):
+        """
+        Returns the list of label names used to group the tests, as defined by "hierarchy" inside the [grouping]
+        section. Either a preset name (suites, behaviors) or a comma separated list of label names.
+        """
+        hierarchy = self.config.get("grouping", {}).get("hierarchy", "").strip().lower()
+        if hierarchy in HIERARCHIES:
+            return HIERARCHIES[hierarchy]
+        return [name.strip() for name in hierarchy.split(",") if name.strip()]
+
+    def _build_groups(self):
+        """
+        Builds the group tree of the sorted results using the label index. Each group holds its sub groups, its tests
+        and the result counts of all tests below it. Sub groups are keyed by label name and value, so the groups of a
+        test missing a level are not merged with the groups of that level. Sibling groups sharing a value are named
+        with their label name, e.g. "X (suite)". Returns None if no grouping is configured.
+        """
+        hierarchy = self._get_hierarchy()
+        if not hierarchy:
+            return None
+
+        counter = count()
+
+        def new_group():
+            return {
+                "path": [],
+                "id": next(counter),
+                "children": {},
+                "tests": [],
+                "results": {status: 0 for status in STATUSES},
+                "total": 0,
+            }
+
+        root = new_group()
+        for test in self.sorted_recent_results:
+            group = root
+            groups = []
+            for label_name in hierarchy:
+                values = test["label_index"].get(label_name)
+                if not values:
+                    continue
+                key = (label_name, values[0])  # a missing level must not merge the next level into this one
+                if key not in group["children"]:
+                    group["children"][key] = new_group()
+                group = group["children"][key]
+                groups.append(group)
+            if not groups:  # the root group only counts the tests without any hierarchy label
+                groups.append(root)
+            group["tests"].append(test)
+            for group in groups:
+                group["results"][test["status"]] += 1
+                group["total"] += 1
+
+        def assign_paths(group):
+            values = Counter(value for _, value in group["children"])
+            for (label_name, value), child in group["children"].items():
+                child["path"] = group["path"] + [f"{value} ({label_name})" if values[value] > 1 else value]
+                assign_paths(child)
+
+        assign_paths(root)
+        return root
+
     def _create_pie_chart(self):
         """
-        Creates the pie chart for allure results overview and saves it into the allure_dir folder.
+        Creates the pie chart for allure results overview as PNG in memory. Nothing is written into the allure_dir
+        folder, so concurrent builds of the same results do not interfere.
         """
-        img_file = os.path.join(self.session["allure_dir"], "pie.png")
+        img_file = io.BytesIO()
         self.session["pie_chart_source"] = img_file
 
         color_map = {
@@ -222,7 +452,8 @@ class ReportBuilder:
         fig, ax = plt.subplots()
         ax.pie(data_arr, startangle=90, wedgeprops=dict(width=0.5), labels=data_arr, labeldistance=0.7, colors=colors)
         ax.legend(labels, frameon=False, loc='upper left', bbox_to_anchor=(-0.25, 0, 0.5, 1))
-        fig.savefig(img_file, bbox_inches="tight")
+        fig.savefig(img_file, format="png", bbox_inches="tight")
+        plt.close(fig)
 
     def _print_report(self):
         """
@@ -246,14 +477,46 @@ class ReportBuilder:
 
         self.document.add_page_break()
 
+        if self.changes is not None:
+            self._print_changes()
+            self.document.add_page_break()
+
+        if self.config.get("timing", {}).get("enabled", "no").lower() in ("yes", "true", "on", "1"):
+            self._print_timing_analysis()
+            self.document.add_page_break()
+
         # print tests
-        for test in self.sorted_recent_results:
-            # print only the most recent test, history could be included later.
-            self._print_test(test)
+        if self.groups is not None:
+            self._print_groups()
+        else:
+            for test in self.sorted_recent_results:
+                # print only the most recent test, history could be included later.
+                self._print_test(test)
 
-    def _print_attachments(self, item):
+    def _print_groups(self):
         """
-        Print attachments from allure results to the document.
+        Prints a table of contents linking to every group, followed by each group with its heading, a summary of its
+        results and its tests. Tests without any of the hierarchy labels are printed last under "Ungrouped".
+        """
+        groups = list_groups(self.groups)
+        self.document.add_paragraph("Contents", style="TOC Heading")
+        for group, depth in groups:
+            paragraph = self.document.add_paragraph(style=f"toc {min(depth + 1, 3)}")
+            self._add_internal_hyperlink(paragraph, f"{group_name(group)} ({group['total']})", f"group_{group['id']}")
+        self.document.add_page_break()
+
+        for group, depth in groups:
+            paragraph = self.document.add_paragraph(group_title(group), style="Heading 1")
+            self._add_bookmark(paragraph, f"group_{group['id']}", group["id"])
+            self.document.add_paragraph(group_summary(group))
+            for test in group["tests"]:
+                self._print_test(test)
+
+    def _print_attachments(self, item, config_info):
+        """
+        Print attachments from allure results to the document. The info sub dict of the given test must be provided
+        to apply the configuration. Text attachments are only printed if "text_attachments" is configured and only
+        the parts selected by the [text_attachments] section are extracted.
         """
         if "attachments" in item:
             for attachment in item["attachments"]:
@@ -261,11 +524,33 @@ class ReportBuilder:
                     attachment['name'] = ""
                 self.document.add_paragraph(f"[Attachment] {attachment['name']}", style="Step")
                 if "image" in attachment["type"]:
-                    self.document.add_picture(
+                    paragraph = self.streamed_images.add_picture(
                         os.path.join(self.session["allure_dir"], attachment["source"]),
                         width=Mm(100),
                     )
-                    self.document.paragraphs[-1].alignment = WD_ALIGN_PARAGRAPH.LEFT
+                    paragraph.alignment = WD_ALIGN_PARAGRAPH.LEFT
+                elif "text_attachments" in config_info and text_attachment.is_text_attachment(attachment):
+                    text = text_attachment.extract_text(
+                        os.path.join(self.session["allure_dir"], attachment["source"]),
+                        **self._get_text_attachment_config(),
+                    )
+                    table = self.document.add_table(rows=1, cols=1, style="Trace table")
+                    table.rows[0].cells[0].add_paragraph(text + "\n", style="Code")
+                    self.document.add_paragraph("", style=None)
+
+    def _get_text_attachment_config(self):
+        """
+        Returns the extraction parameters for text attachments from the [text_attachments] section.
+        """
+        section = self.config.get("text_attachments", {})
+        text_config = {}
+        for key, default in text_attachment.DEFAULTS.items():
+            value = section.get(key, "").strip()
+            if isinstance(default, str):
+                text_config[key] = value
+            else:
+                text_config[key] = int(value) if value else default
+        return text_config
 
     @staticmethod
     def _format_argval(argval):
@@ -312,7 +597,7 @@ class ReportBuilder:
                         hdr_cells[0].add_paragraph(step["statusDetails"]["trace"] + "\n", style="Code")
                         self.document.add_paragraph("", style=None)
                 if "attachments" in config_info:
-                    self._print_attachments(step)
+                    self._print_attachments(step, config_info)
                 self._print_steps(step, config_info, indent + 1)
 
     @staticmethod
@@ -340,6 +625,33 @@ class ReportBuilder:
         run._r.append(instr_text)
         run._r.append(fld_char2)
 
+    @staticmethod
+    def _add_bookmark(paragraph, name, bookmark_id):
+        """
+        Wraps the content of the given paragraph into a bookmark with the given name and numeric id.
+        """
+        bookmark_start = OxmlElement('w:bookmarkStart')
+        bookmark_start.set(qn('w:id'), str(bookmark_id))
+        bookmark_start.set(qn('w:name'), name)
+        bookmark_end = OxmlElement('w:bookmarkEnd')
+        bookmark_end.set(qn('w:id'), str(bookmark_id))
+
+        paragraph._p.insert(0, bookmark_start)
+        paragraph._p.append(bookmark_end)
+
+    @staticmethod
+    def _add_internal_hyperlink(paragraph, text, anchor):
+        """
+        Appends a hyperlink with the given text to the given paragraph, pointing to the bookmark named anchor.
+        """
+        hyperlink = OxmlElement('w:hyperlink')
+        hyperlink.set(qn('w:anchor'), anchor)
+        hyperlink.set(qn('w:history'), '1')
+
+        run = paragraph.add_run(text, style="Hyperlink")
+        hyperlink.append(run._r)
+        paragraph._p.append(hyperlink)
+
     def _print_footer(self, footer):
         """
         Prints a footer to the given footer object, including date and page number.
@@ -358,6 +670,14 @@ class ReportBuilder:
         p_element.getparent().remove(p_element)
         p_element._p = p_element._element = None
 
+    def _last_paragraph(self):
+        """
+        Returns the last paragraph of the document body. Unlike document.paragraphs[-1], this does not create
+        objects for all paragraphs of the document.
+        """
+        for element in self.document.element.body.iterchildren(qn('w:p'), reversed=True):
+            return Paragraph(element, self.document._body)
+
     def _print_header(self, header, details=False):
         """
         Prints a header to the given header object. This includes a logo (if a logo is specified)
@@ -455,31 +775,121 @@ class ReportBuilder:
         run.add_picture(self.session["pie_chart_source"], width=Mm(75))
 
         self.document.add_paragraph("")
-        results = self.session['results']
-
-        def print_result_table(status):
-            if results[status] > 0:
-                result_table = self.document.add_table(rows=results[status], cols=2, style=f"{status} table")
-                i = 0
-                for test in self.sorted_recent_results:
-                    if test['status'] == status:
-                        result_table.rows[i].cells[0].paragraphs[-1].add_run(
-                            test['name'])
-                        result_table.rows[i].cells[1].paragraphs[-1].add_run(
-                            status)
-                        i += 1
-
-                result_table.columns[0].width = Cm(12)
-                for cell in result_table.columns[0].cells:
-                    cell.width = Cm(12)
-                result_table.columns[1].width = Cm(4)
-                for cell in result_table.columns[1].cells:
-                    cell.width = Cm(4)
-
-        print_result_table("failed")
-        print_result_table("broken")
-        print_result_table("skipped")
-        print_result_table("passed")
+
+        for status in ("failed", "broken", "skipped", "passed"):
+            self._print_result_table(status)
+
+    def _print_result_table(self, status):
+        """
+        Prints the table listing the names of all tests with the given status. Rows are appended one by one,
+        so the cost grows linearly with the number of tests.
+        """
+        if self.session["results"][status] == 0:
+            return
+        result_table = self.document.add_table(rows=0, cols=2, style=f"{status} table")
+        # new rows take their cell widths from the column widths
+        result_table.columns[0].width = Cm(12)
+        result_table.columns[1].width = Cm(4)
+        for test in self.sorted_recent_results:
+            if test['status'] == status:
+                self._add_result_row(result_table, test)
+
+    def _add_result_row(self, table, test):
+        """
+        Appends the row of the given test to a result table of the session summary.
+        """
+        row = table.add_row()
+        row.cells[0].paragraphs[-1].add_run(test['name'])
+        row.cells[1].paragraphs[-1].add_run(test['status'])
+
+    def _print_grid_table(self, header, rows):
+        """
+        Prints a table with a bold header row and the given rows of strings.
+        """
+        table = self.document.add_table(rows=1, cols=len(header), style="Table Grid")
+        for cell, text in zip(table.rows[0].cells, header):
+            cell.paragraphs[-1].add_run(text).bold = True
+        for row in rows:
+            for cell, text in zip(table.add_row().cells, row):
+                cell.paragraphs[-1].add_run(text)
+        self.document.add_paragraph("")
+
+    def _print_changes(self):
+        """
+        Prints the changes since the baseline given with "baseline" in the config: new, fixed and changed failures,
+        added and removed tests and duration regressions.
+        """
+        self.document.add_paragraph("Changes since baseline", style="Heading 1")
+        self.document.add_paragraph(change_summary(self.changes))
+        for key, title in CHANGE_SECTIONS:
+            if self.changes[key]:
+                self.document.add_heading(title, level=2)
+                self._print_grid_table(["Test", "Baseline", "Current"], change_rows(self.changes, key))
+
+    def _create_histogram(self, hist_counts, edges, log_scale):
+        """
+        Creates the bar chart of the duration histogram and returns it as PNG in memory.
+        """
+        img_file = io.BytesIO()
+        fig, ax = plt.subplots(figsize=(8, 3))
+        if log_scale and edges[0] <= 0:
+            # the bin of the tests without measurable duration has no place on the log axis, drawn left of it instead
+            left = edges[1] ** 2 / edges[2]
+            ax.bar(left, hist_counts[0], width=edges[1] - left, align="edge", color="#AAAAAA", edgecolor="white",
+                   label="0 ms")
+            ax.legend()
+            hist_counts, edges = hist_counts[1:], edges[1:]
+        ax.bar(edges[:-1], hist_counts, width=edges[1:] - edges[:-1], align="edge", color="#97CC64", edgecolor="white")
+        if log_scale:
+            ax.set_xscale("log")
+        ax.set_xlabel("Duration [ms]")
+        ax.set_ylabel("Tests")
+        fig.savefig(img_file, format="png", bbox_inches="tight")
+        plt.close(fig)
+        return img_file
+
+    def _print_timing_analysis(self):
+        """
+        Prints the timing analysis, configured in the [timing] section: the slowest tests, duration percentiles
+        per status and per suite, a histogram of the durations and the time spent in fixtures.
+        """
+        timing_config = self.config.get("timing", {})
+        options = {}
+        for key, default in (("slowest", 10), ("bins", 20)):
+            value = timing_config.get(key, "").strip()
+            options[key] = max(1, int(value)) if value else default
+        analysis = self.timing.analyze(**options)
+        self.document.add_paragraph("Timing Analysis", style="Heading 1")
+        if analysis is None:
+            self.document.add_paragraph("No test durations available.")
+            return
+
+        self.document.add_heading("Slowest Tests", level=2)
+        self._print_grid_table(["Test", "Status", "Duration"], [
+            (name, status, format_duration(duration)) for name, status, duration in analysis["slowest"]
+        ])
+
+        header = ["Count"] + [f"p{p}" for p in PERCENTILES] + ["Max"]
+        for title, key in (("Durations by Status", "by_status"), ("Durations by Suite", "by_suite")):
+            self.document.add_heading(title, level=2)
+            names, counts, percentiles, maxima = analysis[key]
+            self._print_grid_table([title.split()[-1]] + header, [
+                [str(name), str(count)] + [format_duration(value) for value in values]
+                + [format_duration(maximum)]
+                for name, count, values, maximum in zip(names, counts, percentiles, maxima)
+            ])
+
+        self.document.add_heading("Duration Histogram", level=2)
+        self.document.add_picture(self._create_histogram(*analysis["histogram"]), width=Mm(150))
+
+        self.document.add_heading("Fixture Overhead", level=2)
+        fixtures = analysis["fixtures"]
+        total = sum(fixtures.values())
+        self._print_grid_table(["", "Total", "Mean per test", "Share"], [
+            [name.capitalize(), format_duration(value), format_duration(value / analysis["count"]),
+             "{:.2f}%".format(100 * value / total) if total > 0 else "Not available"]
+            for name, value in fixtures.items()
+        ])
 
     def _print_test(self, test):
         """
@@ -494,18 +904,9 @@ class ReportBuilder:
         table = None
         added_table = False
         if "duration" in config_info:
-            duration = test["stop"] - test["start"]
-            duration_unit = "ms"
-            if duration > 1000:
-                duration_unit = "s"
-                duration = duration / 1000
-                if duration > 60:
-                    duration_unit = "min"
-                    duration = duration / 60
-
             table = self.document.add_table(rows=1, cols=2, style="Label table")
             table.rows[0].cells[0].paragraphs[-1].clear().add_run("Duration")
-            table.rows[0].cells[1].paragraphs[-1].clear().add_run(str(duration) + duration_unit)
+            table.rows[0].cells[1].paragraphs[-1].clear().add_run(format_duration(test["stop"] - test["start"]))
             added_table = True
 
         # add labels to table
@@ -513,14 +914,12 @@ class ReportBuilder:
             if not added_table:
                 table = self.document.add_table(rows=0, cols=2, style="Label table")
                 added_table = True
-            iterator = iter(label for label in test["labels"] if label["name"].lower() == label_name)
-            label = next(iterator, None)
-            if label is not None:
+            values = test["label_index"].get(label_name)
+            if values:
                 row = table.add_row()
                 row.cells[0].paragraphs[-1].clear().add_run(label_name.capitalize())
-                while label is not None:
-                    row.cells[1].add_paragraph(label["value"])
-                    label = next(iterator, None)
+                for value in values:
+                    row.cells[1].add_paragraph(value)
                 self._delete_paragraph(row.cells[1].paragraphs[0])
 
         if table is not None:
@@ -578,17 +977,17 @@ class ReportBuilder:
                 if "befores" in parent:
                     for before in parent["befores"]:
                         self.document.add_paragraph(f"[Fixture] {before['name']}", style="Step")
-                        self._print_attachments(before)
+                        self._print_attachments(before, config_info)
                         self._print_steps(before, config_info, 1)
-            if self.document.paragraphs[-1].text == "Test Setup":
-                self._delete_paragraph(self.document.paragraphs[-1])
+            if self._last_paragraph().text == "Test Setup":
+                self._delete_paragraph(self._last_paragraph())
 
         if "body" in config_info:
             self.document.add_heading("Test Body", level=2)
-            self._print_attachments(test)
+            self._print_attachments(test, config_info)
             self._print_steps(test, config_info)
-            if self.document.paragraphs[-1].text == "Test Body":
-                self._delete_paragraph(self.document.paragraphs[-1])
+            if self._last_paragraph().text == "Test Body":
+                self._delete_paragraph(self._last_paragraph())
 
         if "teardown" in config_info:
             self.document.add_heading("Test Teardown", level=2)
@@ -596,9 +995,9 @@ class ReportBuilder:
                 if "afters" in parent:
                     for after in parent["afters"]:
                         self.document.add_paragraph(f"[Fixture] {after['name']}", style="Step")
-                        self._print_attachments(after)
+                        self._print_attachments(after, config_info)
                         self._print_steps(after, config_info, 1)
-            if self.document.paragraphs[-1].text == "Test Teardown":
-                self._delete_paragraph(self.document.paragraphs[-1])
+            if self._last_paragraph().text == "Test Teardown":
+                self._delete_paragraph(self._last_paragraph())
 
         self.document.add_paragraph("", style=None)
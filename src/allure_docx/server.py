@@ -0,0 +1,384 @@
+import copy
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import click
+from docx import Document
+
+from allure_docx.cache import hash_directory
+from allure_docx.config import DEFAULT_TEMPLATE, ConfigTags, ReportConfig
+from allure_docx.report_builder import ReportBuilder
+
+FORMATS = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pdf": "application/pdf",
+}
+
+# per worker process caches, filled on first use and kept for the lifetime of the worker
+_configs = {}
+_templates = {}
+
+
+class QueueFullError(Exception):
+    """
+    Raised if a job is submitted while the maximum number of jobs is already queued or running.
+    """
+
+
+class _WarmReportBuilder(ReportBuilder):
+    """
+    ReportBuilder creating its document from the template bytes cached in the worker process.
+    """
+
+    def _load_template(self):
+        path = self.config['template_path']
+        if path not in _templates:
+            with open(path, "rb") as file:
+                _templates[path] = file.read()
+        return Document(io.BytesIO(_templates[path]))
+
+
+def _get_config(config_tag=None, config_file=None, title=None, config_hash=None):
+    """
+    Returns a copy of the cached ReportConfig for the given tag or file, creating it on first use. The hash of the
+    config file contents is part of the key, so an edited file is read again.
+    """
+    key = (config_tag, config_file, config_hash)
+    if key not in _configs:
+        for outdated in [cached for cached in _configs if cached[:2] == key[:2]]:
+            del _configs[outdated]
+        if config_tag:
+            _configs[key] = ReportConfig(tag=ConfigTags[config_tag.upper()])
+        else:
+            _configs[key] = ReportConfig(config_file=config_file)
+    config = copy.deepcopy(_configs[key])
+    if title is not None:
+        config['cover']['title'] = title
+    return config
+
+
+def _render_job(allure_dir, output, options):
+    """
+    Builds the report of a job in a worker process. Returns the time spent building.
+    """
+    start = time.perf_counter()
+    config = _get_config(
+        options.get("config_tag"), options.get("config_file"), options.get("title"), options.get("config_hash")
+    )
+    report_builder = _WarmReportBuilder(allure_dir=allure_dir, config=config)
+    if options["format"] == "pdf":
+        report_builder.save_report_to_pdf(output)
+    else:
+        report_builder.save_report(output)
+    return time.perf_counter() - start
+
+
+def _warm_up():
+    """
+    Worker initializer. Loads the standard config and the default template, so the first job is already fast.
+    """
+    _get_config()
+    with open(DEFAULT_TEMPLATE, "rb") as file:
+        _templates[DEFAULT_TEMPLATE] = file.read()
+
+
+class ReportService:
+    """
+    Renders reports on a pool of warm worker processes. Jobs beyond the number of workers wait in a bounded queue,
+    identical jobs share one build and finished reports are cached by the hash of their input.
+    """
+
+    def __init__(self, workers=2, queue_size=16, cache_size=32):
+        """
+        Parameters:
+            workers : Number of worker processes.
+            queue_size : Maximum number of jobs waiting for a worker. Further jobs raise a QueueFullError.
+            cache_size : Number of finished reports kept in the cache, at least 1.
+        """
+        if cache_size < 1:
+            raise ValueError("cache_size must be at least 1.")
+        self.workers = workers
+        self.queue_size = queue_size
+        self.cache_size = cache_size
+        self.work_dir = tempfile.mkdtemp(prefix="allure-docx-")
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=_warm_up
+        )
+        self.lock = threading.RLock()  # reentrant, done callbacks may run while submitting
+        self.cache = OrderedDict()
+        self.in_flight = {}
+        self.latencies = deque(maxlen=1000)
+        self.build_times = deque(maxlen=1000)
+        self.counters = {"completed": 0, "failed": 0, "cache_hits": 0, "rejected": 0}
+
+    @staticmethod
+    def _check_options(options):
+        """
+        Validates the given job options and returns them with the default format, without empty values and with the
+        hash of the config file contents (if any), so jobs are built again after the config file changed.
+        """
+        options = {"format": "docx", **{key: value for key, value in options.items() if value is not None}}
+        options.pop("config_hash", None)
+        if options["format"] not in FORMATS:
+            raise ValueError(f"Unknown format {options['format']}.")
+        if options.get("config_tag") and options.get("config_file"):
+            raise ValueError("Cannot define both config_file and config_tag.")
+        if options.get("config_tag") and options["config_tag"] not in ConfigTags.get_names():
+            raise ValueError(f"Unknown config_tag {options['config_tag']}.")
+        if options.get("config_file"):
+            if not os.path.isfile(options["config_file"]):
+                raise ValueError(f"Config file {options['config_file']} does not exist.")
+            with open(options["config_file"], "rb") as file:
+                options["config_hash"] = hashlib.sha256(file.read()).hexdigest()
+        return options
+
+    def _get_cached(self, job_hash):
+        """
+        Returns the content of the cached report for the given job hash or None. The report is read while holding
+        the lock, so it cannot be evicted meanwhile.
+        """
+        with self.lock:
+            if job_hash in self.cache:
+                self.cache.move_to_end(job_hash)
+                self.counters["cache_hits"] += 1
+                with open(self.cache[job_hash], "rb") as file:
+                    return file.read()
+        return None
+
+    def render(self, allure_dir, options):
+        """
+        Renders the report of the given allure directory and blocks until it is done. The options may contain
+        "format" (docx or pdf), "config_tag", "config_file" and "title". Returns the content of the report and
+        whether it was taken from the cache.
+        """
+        options = self._check_options(options)
+        if not os.path.isdir(allure_dir):
+            raise ValueError(f"{allure_dir} is not a directory.")
+        job_hash = hashlib.sha256(
+            (hash_directory(allure_dir) + json.dumps(options, sort_keys=True)).encode("utf-8")
+        ).hexdigest()
+        return self._submit(job_hash, allure_dir, options)
+
+    def render_archive(self, archive, options):
+        """
+        Renders the report of the allure results in the given zip archive (bytes), see render.
+        """
+        options = self._check_options(options)
+        job_hash = hashlib.sha256(archive + json.dumps(options, sort_keys=True).encode("utf-8")).hexdigest()
+        report = self._get_cached(job_hash)
+        if report is not None:
+            return report, True
+
+        allure_dir = tempfile.mkdtemp(dir=self.work_dir)
+        try:
+            with zipfile.ZipFile(io.BytesIO(archive)) as zip_file:
+                zip_file.extractall(allure_dir)
+            entries = os.listdir(allure_dir)
+            if len(entries) == 1 and os.path.isdir(os.path.join(allure_dir, entries[0])):
+                return self._submit(job_hash, os.path.join(allure_dir, entries[0]), options)
+            return self._submit(job_hash, allure_dir, options)
+        finally:
+            shutil.rmtree(allure_dir, ignore_errors=True)
+
+    def _submit(self, job_hash, allure_dir, options):
+        """
+        Returns the cached report for the given job hash or builds it on a worker and waits for it.
+        """
+        submitted = time.perf_counter()
+        report = self._get_cached(job_hash)
+        if report is not None:
+            return report, True
+        with self.lock:
+            future = self.in_flight.get(job_hash)
+            if future is None:
+                if len(self.in_flight) >= self.workers + self.queue_size:
+                    self.counters["rejected"] += 1
+                    raise QueueFullError(f"{len(self.in_flight)} jobs are already queued or running.")
+                # own directory per job, save_report_to_pdf writes its temporary files next to the output
+                job_dir = os.path.join(self.work_dir, job_hash)
+                os.makedirs(job_dir, exist_ok=True)
+                output = os.path.join(job_dir, f"report.{options['format']}")
+                future = self.executor.submit(_render_job, allure_dir, output, options)
+                future.output = output
+                future.report = None
+                future.finished = threading.Event()
+                self.in_flight[job_hash] = future
+                future.add_done_callback(lambda f: self._finish(job_hash, f, submitted))
+
+        future.result()
+        future.finished.wait()  # the result is available before the done callback ran
+        if future.report is None:
+            raise RuntimeError("The report could not be created (for pdf, Word or soffice is required).")
+        return future.report, False
+
+    def _finish(self, job_hash, future, submitted):
+        """
+        Done callback of a job. Reads the report for the waiting requests (before it can be evicted), moves it into
+        the cache and records the latency.
+        """
+        with self.lock:
+            try:
+                self._finish_locked(job_hash, future, submitted)
+            finally:
+                future.finished.set()
+
+    def _finish_locked(self, job_hash, future, submitted):
+        """
+        See _finish, called while holding the lock.
+        """
+        del self.in_flight[job_hash]
+        if future.exception() is not None or not os.path.isfile(future.output):
+            self.counters["failed"] += 1
+            shutil.rmtree(os.path.dirname(future.output), ignore_errors=True)
+            return
+        with open(future.output, "rb") as file:
+            future.report = file.read()
+        self.counters["completed"] += 1
+        self.latencies.append(time.perf_counter() - submitted)
+        self.build_times.append(future.result())
+        self.cache[job_hash] = future.output
+        while len(self.cache) > self.cache_size:
+            _, path = self.cache.popitem(last=False)
+            shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+    def metrics(self):
+        """
+        Returns the queue depth, job counters and latency statistics (in seconds) of the last finished jobs.
+        The latency includes the time waiting in the queue, the build time only the time spent in the worker.
+        """
+        with self.lock:
+            in_flight = len(self.in_flight)
+            latencies = sorted(self.latencies)
+            build_times = list(self.build_times)
+            metrics = {
+                "queue_depth": max(0, in_flight - self.workers),
+                "running": min(in_flight, self.workers),
+                "cached": len(self.cache),
+                **self.counters,
+            }
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] if latencies else None
+
+        metrics["latency"] = {
+            "count": len(latencies),
+            "mean": sum(latencies) / len(latencies) if latencies else None,
+            "p50": percentile(50),
+            "p95": percentile(95),
+            "max": latencies[-1] if latencies else None,
+            "build_mean": sum(build_times) / len(build_times) if build_times else None,
+        }
+        return metrics
+
+    def close(self):
+        """
+        Shuts down the worker processes and removes all cached reports.
+        """
+        self.executor.shutdown(cancel_futures=True)
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP interface of the ReportService:
+        POST /render?allure_dir=...&format=...&config_tag=...&config_file=...&title=...
+            Renders the given directory, or the zip archive sent as request body if allure_dir is not given.
+            Responds with the report file.
+        GET /metrics
+            Responds with the service metrics as JSON.
+    """
+
+    def _send(self, status, body, content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, data):
+        self._send(status, json.dumps(data).encode("utf-8"))
+
+    def do_GET(self):  # noqa
+        if urlparse(self.path).path == "/metrics":
+            self._send_json(200, self.server.service.metrics())
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):  # noqa
+        url = urlparse(self.path)
+        if url.path != "/render":
+            self._send_json(404, {"error": "Not found"})
+            return
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        allure_dir = query.pop("allure_dir", None)
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            if allure_dir is not None:
+                report, cached = self.server.service.render(allure_dir, query)
+            elif body:
+                report, cached = self.server.service.render_archive(body, query)
+            else:
+                raise ValueError("Either allure_dir or a zip archive of the allure results is required.")
+        except QueueFullError as e:
+            self._send_json(503, {"error": str(e)})
+        except (ValueError, zipfile.BadZipFile) as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:  # noqa
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+        else:
+            fmt = query.get("format", "docx")
+            self._send(200, report, FORMATS[fmt], {"X-Cache": "hit" if cached else "miss"})
+
+    def log_message(self, format, *args):  # noqa
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def create_server(service, host="127.0.0.1", port=8000, quiet=False):
+    """
+    Creates a threading HTTP server handling requests with the given ReportService.
+    """
+    server = ThreadingHTTPServer((host, port), _RequestHandler)
+    server.service = service
+    server.quiet = quiet
+    return server
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1", help="Host name or address to listen on.")
+@click.option("--port", default=8000, help="Port to listen on.")
+@click.option("--workers", default=2, help="Number of worker processes rendering reports.")
+@click.option("--queue-size", default=16, help="Maximum number of jobs waiting for a worker.")
+@click.option(
+    "--cache-size", default=32, type=click.IntRange(min=1), help="Number of finished reports kept in the cache."
+)
+def main(host, port, workers, queue_size, cache_size):
+    """Runs a local report rendering service, see README for the HTTP interface."""
+    service = ReportService(workers=workers, queue_size=queue_size, cache_size=cache_size)
+    server = create_server(service, host, port)
+    print(f"Serving on http://{host}:{server.server_port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import hashlib
+import os
+
+from docx.image.image import Image, _ImageHeaderFactory
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PackURI
+from docx.opc.pkgwriter import PackageWriter
+from docx.oxml.shape import CT_Inline
+from docx.parts.image import ImagePart
+
+from allure_docx.zip_writer import ZipEntry, write_zip
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class StreamedImage(Image):
+    """
+    Image that only keeps the path of its file. The header is parsed and the SHA1 hash computed while streaming
+    the file, so the image bytes are never held in memory.
+    """
+
+    def __init__(self, path, image_header, sha1):
+        super().__init__(None, os.path.basename(path), image_header)
+        self.path = path
+        self._sha1 = sha1
+
+    @classmethod
+    def from_path(cls, path):
+        """
+        Creates a StreamedImage from the image file at the given path.
+        """
+        sha1 = hashlib.sha1()
+        with open(path, "rb") as file:
+            image_header = _ImageHeaderFactory(file)
+            file.seek(0)
+            for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+                sha1.update(chunk)
+        return cls(path, image_header, sha1.hexdigest())
+
+    @property
+    def blob(self):
+        with open(self.path, "rb") as file:
+            return file.read()
+
+    @property
+    def sha1(self):
+        return self._sha1
+
+
+class StreamedImagePart(ImagePart):
+    """
+    Image part referencing a StreamedImage. Its bytes are copied from the image file into the docx file at save time.
+    """
+
+    def __init__(self, partname, image):
+        super().__init__(partname, image.content_type, None, image)
+        self.path = image.path
+
+    @property
+    def blob(self):
+        return self._image.blob
+
+    @property
+    def sha1(self):
+        return self._image.sha1
+
+
+class _EntryCollector:
+    """
+    Physical package writer used by python-docx' PackageWriter, collecting the written items as ZipEntries.
+    """
+
+    def __init__(self):
+        self.entries = []
+
+    def write(self, pack_uri, blob):
+        self.entries.append(ZipEntry(pack_uri.membername, data=blob))
+
+
+class StreamedImages:
+    """
+    Adds pictures to a document as StreamedImageParts and saves the document, streaming each picture file directly
+    into the docx file. Memory usage is therefore independent of the number and size of the pictures.
+    """
+
+    def __init__(self, document, images=None):
+        """
+        Parameters:
+            document : The python-docx Document the pictures are added to.
+            images : Optional dict mapping image paths to StreamedImages, shared between documents to avoid reading
+                the same image file again.
+        """
+        self.document = document
+        self.images = {} if images is None else images
+        self.image_parts = document.part.package.image_parts
+        self._parts_by_sha1 = {}
+        self._image_number = max((image_part.partname.idx for image_part in self.image_parts), default=0)
+        self._shape_id = None
+
+    def relate_image(self, path):
+        """
+        Returns the relationship id of the document to the image part of the given image file. The image part is
+        created if there is no part with the same image yet.
+        """
+        if path not in self.images:
+            self.images[path] = StreamedImage.from_path(path)
+        image = self.images[path]
+        image_part = self._parts_by_sha1.get(image.sha1)
+        if image_part is None:
+            # python-docx never numbers an image above the number of image parts, so this one is always unused
+            self._image_number = max(self._image_number, len(self.image_parts)) + 1
+            image_part = StreamedImagePart(PackURI(f"/word/media/image{self._image_number}.{image.ext}"), image)
+            self.image_parts.append(image_part)
+            self._parts_by_sha1[image.sha1] = image_part
+        return self.document.part.relate_to(image_part, RT.IMAGE)
+
+    def next_shape_id(self):
+        """
+        Returns an unused id for a new picture shape in the document.
+        """
+        if self._shape_id is None:
+            self._shape_id = self.document.part.next_id
+        else:
+            self._shape_id += 1
+        return self._shape_id
+
+    def add_picture(self, path, width=None, height=None):
+        """
+        Adds a picture from the given image file in a new paragraph at the end of the document and returns the
+        paragraph. Identical images share one image part.
+        """
+        r_id = self.relate_image(path)
+        image = self.images[path]
+        cx, cy = image.scaled_dimensions(width, height)
+        inline = CT_Inline.new_pic_inline(self.next_shape_id(), r_id, image.filename, cx, cy)
+        paragraph = self.document.add_paragraph()
+        paragraph.add_run()._r.add_drawing(inline)
+        return paragraph
+
+    def save(self, output, compression=6):
+        """
+        Saves the document to the given path. StreamedImageParts are copied chunk-wise from their image files,
+        see zip_writer.write_zip for the compression.
+        """
+        package = self.document.part.package
+        parts = list(package.parts)
+        for part in parts:
+            part.before_marshal()
+
+        # same steps as PackageWriter.write (private API, stable in python-docx 0.8.11 to 1.x, see setup.py)
+        collector = _EntryCollector()
+        PackageWriter._write_content_types_stream(collector, parts)
+        PackageWriter._write_pkg_rels(collector, package.rels)
+        for part in parts:
+            if isinstance(part, StreamedImagePart):
+                collector.entries.append(ZipEntry(part.partname.membername, path=part.path))
+            else:
+                collector.write(part.partname, part.blob)
+            if len(part.rels):
+                collector.write(part.partname.rels_uri, part.rels.xml)
+        write_zip(output, collector.entries, compression)
@@ -0,0 +1,128 @@
+import mmap
+import os
+import re
+
+TEXT_TYPES = ("text/", "application/json", "application/xml", "application/x-yaml")
+
+DEFAULTS = {
+    "head": 20,
+    "tail": 20,
+    "grep": "",
+    "context": 2,
+    "max_matches": 20,
+    "max_line_length": 500,
+}
+
+
+def is_text_attachment(attachment):
+    """
+    Returns True if the given allure attachment has a text based mime type (text/plain, application/json, ...).
+    """
+    return attachment.get("type", "").startswith(TEXT_TYPES)
+
+
+def _line_start(mm, pos):
+    """
+    Returns the start of the line containing pos.
+    """
+    return mm.rfind(b"\n", 0, pos) + 1
+
+
+def _line_end(mm, pos):
+    """
+    Returns the end (after the newline) of the line containing pos.
+    """
+    newline = mm.find(b"\n", pos)
+    return newline + 1 if newline != -1 else len(mm)
+
+
+def _lines_forward(mm, pos, lines):
+    """
+    Moves the line start pos the given number of lines forward.
+    """
+    for _ in range(lines):
+        if pos >= len(mm):
+            break
+        pos = _line_end(mm, pos)
+    return pos
+
+
+def _lines_backward(mm, pos, lines):
+    """
+    Moves the line start pos the given number of lines backward.
+    """
+    for _ in range(lines):
+        if pos <= 0:
+            break
+        pos = _line_start(mm, pos - 1)
+    return pos
+
+
+def _read_lines(mm, start, end, max_line_length):
+    """
+    Yields the lines between the line starts start and end. Lines longer than max_line_length bytes are cut,
+    without reading the rest of the line.
+    """
+    while start < end:
+        line_end = min(_line_end(mm, start), end)
+        content_end = line_end - 1 if mm[line_end - 1:line_end] == b"\n" else line_end
+        if content_end - start > max_line_length:
+            line = mm[start:start + max_line_length].decode("utf-8", errors="replace")
+            yield f"{line} [... {content_end - start - max_line_length} bytes cut ...]"
+        else:
+            yield mm[start:content_end].decode("utf-8", errors="replace")
+        start = line_end
+
+
+def _merge_ranges(ranges):
+    """
+    Sorts the given (start, end) byte ranges and merges the overlapping ones.
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        elif end > start:
+            merged.append((start, end))
+    return merged
+
+
+def extract_text(path, head=DEFAULTS["head"], tail=DEFAULTS["tail"], grep=DEFAULTS["grep"],
+                 context=DEFAULTS["context"], max_matches=DEFAULTS["max_matches"],
+                 max_line_length=DEFAULTS["max_line_length"]):
+    """
+    Extracts the first head lines, the last tail lines and the lines matching the regular expression grep
+    (with context lines around each of the first max_matches matches) from the given text file.
+
+    The file is memory mapped, so only the extracted lines are ever read into memory, regardless of the file size.
+    Lines longer than max_line_length bytes are cut (marked with "[... n bytes cut ...]"), but still count as one
+    line. Skipped parts are marked with "[... n bytes skipped ...]".
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return ""
+
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        ranges = [
+            (0, _lines_forward(mm, 0, head)),
+            (_lines_backward(mm, size, tail), size),
+        ]
+        if grep:
+            pattern = re.compile(grep.encode("utf-8"))
+            for match_count, match in enumerate(pattern.finditer(mm)):
+                if match_count >= max_matches:
+                    break
+                start = _line_start(mm, match.start())
+                end = _line_end(mm, match.start())
+                ranges.append((_lines_backward(mm, start, context), _lines_forward(mm, end, context)))
+
+        parts = []
+        last = 0
+        for start, end in _merge_ranges(ranges):
+            if start > last:
+                parts.append(f"[... {start - last} bytes skipped ...]")
+            parts.extend(_read_lines(mm, start, end, max_line_length))
+            last = end
+        if last < size:
+            parts.append(f"[... {size - last} bytes skipped ...]")
+    return "\n".join(parts)
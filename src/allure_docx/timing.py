@@ -0,0 +1,108 @@
+import numpy as np
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class TimingData:
+    """
+    Start and stop times of the tests (and the durations of their fixtures), collected while the results are read
+    and analyzed at once with numpy. All times are in milliseconds. The fixtures of a container shared by several
+    tests (e.g. session or module fixtures) are counted once, for the first of its tests.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.statuses = []
+        self.suites = []
+        self.starts = []
+        self.stops = []
+        self.setups = []
+        self.teardowns = []
+        self.containers = set()
+
+    @staticmethod
+    def _fixture_duration(fixtures):
+        return sum(
+            fixture["stop"] - fixture["start"] for fixture in fixtures if "start" in fixture and "stop" in fixture
+        )
+
+    def add(self, result, suite):
+        """
+        Adds the given result (with its "parents" containers already assigned) belonging to the given suite.
+        """
+        parents = [parent for parent in result["parents"] if parent.get("uuid") not in self.containers]
+        self.containers.update(parent["uuid"] for parent in parents if "uuid" in parent)
+        self.names.append(result["name"])
+        self.statuses.append(result["status"])
+        self.suites.append(suite)
+        self.starts.append(result.get("start", np.nan))
+        self.stops.append(result.get("stop", np.nan))
+        self.setups.append(sum(self._fixture_duration(parent.get("befores", [])) for parent in parents))
+        self.teardowns.append(sum(self._fixture_duration(parent.get("afters", [])) for parent in parents))
+
+    @staticmethod
+    def _grouped_percentiles(keys, durations):
+        """
+        Returns the group names, counts, PERCENTILES (linear interpolation, like numpy.percentile) and maxima of the
+        durations grouped by the given keys, computed on one sort of all durations.
+        """
+        names, inverse = np.unique(keys, return_inverse=True)
+        sorted_durations = durations[np.lexsort((durations, inverse))]
+        counts = np.bincount(inverse, minlength=len(names))
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+        positions = np.array(PERCENTILES)[None, :] / 100 * (counts[:, None] - 1)
+        lower = np.floor(positions).astype(int)
+        upper = np.ceil(positions).astype(int)
+        low_values = sorted_durations[offsets[:, None] + lower]
+        high_values = sorted_durations[offsets[:, None] + upper]
+        percentiles = low_values + (high_values - low_values) * (positions - lower)
+        maxima = sorted_durations[offsets + counts - 1]
+        return names, counts, percentiles, maxima
+
+    def analyze(self, slowest=10, bins=20):
+        """
+        Returns a dict with the slowest tests, the duration percentiles per status and per suite, a histogram
+        of the durations and the total setup, body and teardown times. Tests without start or stop are ignored.
+        If the histogram is logarithmic, the tests that took no time get an extra first bin starting at 0 (or at the
+        shortest duration, if negative).
+        """
+        starts = np.array(self.starts, dtype=float)
+        stops = np.array(self.stops, dtype=float)
+        durations = stops - starts
+        valid = np.isfinite(durations)
+        indices = np.flatnonzero(valid)
+        durations = durations[valid]
+        if len(durations) == 0:
+            return None
+        statuses = np.array(self.statuses)[valid]
+        suites = np.array(self.suites)[valid]
+
+        count = min(slowest, len(durations))
+        top = np.argpartition(-durations, count - 1)[:count]
+        top = top[np.argsort(-durations[top], kind="stable")]
+
+        positive = durations[durations > 0]
+        if len(positive) > 0 and positive.max() / positive.min() > 100:
+            edges = np.geomspace(positive.min(), positive.max(), bins + 1)
+            hist_counts, edges = np.histogram(positive, edges)
+            if len(positive) < len(durations):
+                hist_counts = np.concatenate(([len(durations) - len(positive)], hist_counts))
+                edges = np.concatenate(([min(durations.min(), 0)], edges))
+            log_scale = True
+        else:
+            hist_counts, edges = np.histogram(durations, bins)
+            log_scale = False
+
+        return {
+            "count": len(durations),
+            "slowest": [(self.names[indices[i]], statuses[i], durations[i]) for i in top],
+            "by_status": self._grouped_percentiles(statuses, durations),
+            "by_suite": self._grouped_percentiles(suites, durations),
+            "histogram": (hist_counts, edges, log_scale),
+            "fixtures": {
+                "setup": float(np.array(self.setups, dtype=float)[valid].sum()),
+                "body": float(durations.sum()),
+                "teardown": float(np.array(self.teardowns, dtype=float)[valid].sum()),
+            },
+        }
@@ -0,0 +1,254 @@
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import time
+
+from docx.oxml.ns import qn
+
+from allure_docx.report_builder import ReportBuilder
+
+WATCHED_SUFFIXES = ("-result.json", "-container.json")
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_NONBLOCK = 0o4000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _InotifyMonitor:
+    """
+    Waits for files written to or moved into a directory using Linux inotify (through libc, no extra dependency).
+    """
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(_IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), _IN_CLOSE_WRITE | _IN_MOVED_TO) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout):
+        """
+        Waits at most timeout seconds and returns the names of the files written in the meantime.
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        names = []
+        buffer = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(buffer):
+            _, _, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            names.append(os.fsdecode(buffer[offset:offset + length].rstrip(b"\0")))
+            offset += length
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _PollingMonitor:
+    """
+    Waits for new files in a directory by listing it periodically. Used where inotify is not available.
+    """
+
+    def __init__(self, directory, interval=1.0):
+        self.directory = directory
+        self.interval = interval
+        self.known = set(os.listdir(directory))
+
+    def wait(self, timeout):
+        """
+        Waits at most timeout seconds and returns the names of the files that appeared in the meantime.
+        """
+        time.sleep(min(timeout, self.interval))
+        names = set(os.listdir(self.directory))
+        new_names = names - self.known
+        self.known = names
+        return list(new_names)
+
+    def close(self):
+        pass
+
+
+class _Fragment:
+    """
+    The body elements printed for one test, together with the picture elements that reference the document they
+    were printed into.
+    """
+
+    def __init__(self, elements, document):
+        self.elements = elements
+        self.images = []
+        self.shapes = []
+        for element in elements:
+            for blip in element.iter(qn("a:blip")):
+                self.images.append((blip, document.part.related_parts[blip.get(qn("r:embed"))].path))
+            self.shapes.extend(element.iter(qn("wp:docPr")))
+
+
+class _LiveReportBuilder(ReportBuilder):
+    """
+    ReportBuilder working on the results already parsed by a ReportWatcher. Tests (and their rows in the summary
+    tables) that did not change since the last build are not printed again, instead their fragments are moved into
+    the new document.
+    """
+
+    def __init__(self, allure_dir, config, watcher):
+        self.watcher = watcher
+        self.fragments = {}
+        self.rows = {}
+        self.sect_pr = None
+        super().__init__(allure_dir, config)
+
+    def _read_data(self):
+        # copies, since building the data modifies the results (e.g. the names of parameterized tests)
+        return [dict(result) for result in self.watcher.results.values()], list(self.watcher.containers.values())
+
+    def _load_baseline(self):
+        if self.watcher.baseline is None:
+            self.watcher.baseline = super()._load_baseline()
+        return self.watcher.baseline
+
+    def _print_report(self):
+        self.streamed_images.images = self.watcher.images
+        # looked up once, body.sectPr searches all body elements
+        self.sect_pr = self.document.element.body.sectPr
+        super()._print_report()
+
+    def _add_result_row(self, table, test):
+        key = (test["uuid"], test["name"], test["status"])
+        row = self.watcher.rows.get(key)
+        if row is None:
+            super()._add_result_row(table, test)
+            row = table._tbl.tr_lst[-1]
+        else:
+            table._tbl.append(row)
+        self.rows[key] = row
+
+    def _print_test(self, test):
+        key = (test["uuid"], test["name"], tuple(parent["uuid"] for parent in test["parents"]))
+        fragment = self.watcher.fragments.get(key)
+        if fragment is None:
+            last = self.sect_pr.getprevious()
+            super()._print_test(test)
+            fragment = _Fragment(list(last.itersiblings())[:-1], self.document)
+        else:
+            for element in fragment.elements:
+                self.sect_pr.addprevious(element)
+            for blip, path in fragment.images:
+                blip.set(qn("r:embed"), self.streamed_images.relate_image(path))
+            for shape in fragment.shapes:
+                shape.set("id", str(self.streamed_images.next_shape_id()))
+        self.fragments[key] = fragment
+
+
+class ReportWatcher:
+    """
+    Watches an allure directory and rewrites the report whenever new result or container files are written.
+    Parsed files and the printed tests are kept in memory, so a refresh only parses and prints the new results.
+    """
+
+    def __init__(self, allure_dir, output, config, debounce=2.0, max_delay=30.0):
+        """
+        Parameters:
+            allure_dir : Path to the allure results directory.
+            output : Path of the docx report that is rewritten.
+            config : ReportConfig used for every build.
+            debounce : Seconds without new files before the report is rewritten.
+            max_delay : Maximum seconds between a new file and the rewrite, if files are written continuously.
+        """
+        self.allure_dir = allure_dir
+        self.output = output
+        self.config = config
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.results = {}
+        self.containers = {}
+        self.images = {}
+        self.fragments = {}
+        self.rows = {}
+        self.baseline = None
+
+    def ingest(self, file_names=None):
+        """
+        Parses the given (or all) result and container files of the allure directory that were not parsed yet.
+        Files that cannot be parsed (e.g. still being written) are retried on the next call.
+        Returns the number of parsed files.
+        """
+        if file_names is None:
+            file_names = os.listdir(self.allure_dir)
+        count = 0
+        for file_name in file_names:
+            if not file_name.endswith(WATCHED_SUFFIXES) or file_name in self.results or file_name in self.containers:
+                continue
+            try:
+                with open(os.path.join(self.allure_dir, file_name), encoding="utf-8") as file:
+                    data = json.load(file)
+            except (OSError, ValueError):
+                continue
+            if file_name.endswith("-result.json"):
+                self.results[file_name] = data
+            else:
+                self.containers[file_name] = data
+            count += 1
+        return count
+
+    def refresh(self):
+        """
+        Builds the report from the parsed files and saves it. Returns the ReportBuilder or None if there are no
+        results yet.
+        """
+        if not self.results:
+            return None
+        report_builder = _LiveReportBuilder(self.allure_dir, self.config, self)
+        report_builder.save_report(self.output)
+        self.fragments = report_builder.fragments
+        self.rows = report_builder.rows
+        return report_builder
+
+    def run(self):
+        """
+        Watches the allure directory until interrupted (Ctrl+C), rewriting the report after new files were written
+        and no other file followed within the debounce time. Returns the ReportBuilder of the last refresh.
+        """
+        if sys.platform.startswith("linux"):
+            try:
+                monitor = _InotifyMonitor(self.allure_dir)
+            except OSError:
+                monitor = _PollingMonitor(self.allure_dir)
+        else:
+            monitor = _PollingMonitor(self.allure_dir)
+
+        self.ingest()
+        report_builder = self.refresh()
+        print(f"Watching {self.allure_dir} (Ctrl+C to stop)")
+        try:
+            first_change = last_change = None
+            while True:
+                names = monitor.wait(self.debounce)
+                now = time.monotonic()
+                if any(name.endswith(WATCHED_SUFFIXES) for name in names):
+                    first_change = first_change or now
+                    last_change = now
+                elif first_change is None:
+                    continue
+                # refresh after a quiet period, but at least every max_delay seconds during continuous writes
+                if now - last_change >= self.debounce or now - first_change >= self.max_delay:
+                    if self.ingest() > 0:
+                        report_builder = self.refresh() or report_builder
+                        print(f"Report updated: {len(self.results)} result files")
+                    first_change = last_change = None
+        except KeyboardInterrupt:
+            self.ingest()
+            report_builder = self.refresh() or report_builder
+        finally:
+            monitor.close()
+        return report_builder
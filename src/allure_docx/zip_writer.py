@@ -0,0 +1,100 @@
+import os
+import time
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+# formats that are compressed already, deflating them again costs time without reducing the size
+STORED_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif")
+
+CHUNK_SIZE = 1024 * 1024
+WINDOW_SIZE = 32 * 1024
+
+
+class ZipEntry:
+    """
+    Member of a zip file, given either by its content (data) or by the path of a file that is copied at write time.
+    """
+
+    def __init__(self, name, data=None, path=None):
+        self.name = name
+        self.data = data
+        self.path = path
+
+
+def _deflate_chunk(data, start, end, level):
+    """
+    Deflates data[start:end] as part of a raw deflate stream of data. The preceding 32 KiB are used as dictionary
+    and all chunks but the last end with a sync flush, so the compressed chunks can simply be concatenated.
+    """
+    data = memoryview(data)
+    if start > 0:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=data[max(0, start - WINDOW_SIZE):start])
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    compressed = compressor.compress(data[start:end])
+    if end >= len(data):
+        return compressed + compressor.flush()
+    return compressed + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+def _write_raw(zip_file, name, compress_type, crc, file_size, chunks):
+    """
+    Writes a member with the given already compressed chunks to the zip file, which zipfile itself cannot do.
+    The central directory (including zip64 records, if necessary) is still written by zipfile on close.
+    This relies on the private ZipFile attributes fp, filelist, NameToInfo and start_dir, so the result is checked
+    with testzip in the tests.
+    """
+    zip_info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+    zip_info.compress_type = compress_type
+    zip_info.external_attr = 0o600 << 16
+    zip_info.file_size = file_size
+    zip_info.compress_size = sum(len(chunk) for chunk in chunks)
+    zip_info.CRC = crc
+    zip_info.header_offset = zip_file.fp.tell()
+    zip_file.fp.write(zip_info.FileHeader())
+    for chunk in chunks:
+        zip_file.fp.write(chunk)
+    zip_file.filelist.append(zip_info)
+    zip_file.NameToInfo[name] = zip_info
+    zip_file.start_dir = zip_file.fp.tell()
+
+
+def write_zip(output, entries, compression=6, workers=None):
+    """
+    Writes the given ZipEntries to a zip file at output.
+
+    Entries with an already compressed format (see STORED_EXTENSIONS) are stored, the others are deflated with the
+    given compression level (0 stores everything). In-memory entries are deflated in chunks of CHUNK_SIZE in
+    parallel, file entries are streamed from their files.
+    """
+    def is_stored(entry):
+        return compression == 0 or entry.name.lower().endswith(STORED_EXTENSIONS)
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        # submit all chunks first, so they are compressed while the preceding entries are written
+        futures = {}
+        for entry in entries:
+            if entry.data is not None and not is_stored(entry):
+                starts = range(0, max(len(entry.data), 1), CHUNK_SIZE)
+                futures[entry.name] = (
+                    executor.submit(zlib.crc32, entry.data),
+                    [executor.submit(_deflate_chunk, entry.data, start, start + CHUNK_SIZE, compression)
+                     for start in starts],
+                )
+
+        with zipfile.ZipFile(output, "w") as zip_file:
+            for entry in entries:
+                if entry.path is not None:
+                    zip_file.write(
+                        entry.path, entry.name,
+                        compress_type=zipfile.ZIP_STORED if is_stored(entry) else zipfile.ZIP_DEFLATED,
+                        compresslevel=None if is_stored(entry) else compression,
+                    )
+                elif entry.name in futures:
+                    crc, chunks = futures.pop(entry.name)
+                    _write_raw(zip_file, entry.name, zipfile.ZIP_DEFLATED, crc.result(), len(entry.data),
+                               [chunk.result() for chunk in chunks])
+                else:
+                    _write_raw(zip_file, entry.name, zipfile.ZIP_STORED, zlib.crc32(entry.data), len(entry.data),
+                               [entry.data])
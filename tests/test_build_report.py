@@ -1,14 +1,37 @@
 import os
 import shutil
+import io
+import json
+import threading
+import urllib.request
+import zipfile
 import pytest
 
 from allure_docx import commandline
 from allure_docx import ReportConfig
 from click.testing import CliRunner
+from docx import Document
+from docx.oxml.ns import qn
 from allure_docx import ConfigTags
+from allure_docx import ReportBuilder
+from allure_docx.text_attachment import extract_text
+from allure_docx.watch import ReportWatcher
+from allure_docx.server import ReportService, create_server
+from allure_docx.zip_writer import ZipEntry, write_zip
+from allure_docx.timing import TimingData
+from allure_docx.cache import OutputCache
+from allure_docx import compare
+from allure_docx.preview import PreviewBuilder
+from allure_docx.report_builder import group_name, group_title, list_groups
+import numpy as np
 
 file_dir = os.path.dirname(os.path.realpath(__file__))
 
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("ALLURE_DOCX_CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
 def test_create_from_commandline():
     os.makedirs(os.path.join(file_dir, "build"), exist_ok=True)
     runner = CliRunner()
@@ -44,6 +67,388 @@ def test_config():
     assert "teardown" not in config["info"]["failed"]
     assert config["cover"]["company"] == "Test company"
 
+def test_grouping(tmp_path):
+    config = ReportConfig()
+    config["grouping"]["hierarchy"] = "suites"
+    report_builder = ReportBuilder(allure_dir=os.path.join(file_dir, "allure-results"), config=config)
+
+    groups = report_builder.groups
+    assert sorted(groups["children"]) == [("suite", "test_1"), ("suite", "test_2")]
+    assert groups["children"][("suite", "test_2")]["total"] + groups["children"][("suite", "test_1")]["total"] == 3
+    assert not groups["tests"]
+
+    # hyperlink runs are not part of Paragraph.text in python-docx 0.8
+    paragraphs = ["".join(t.text for t in p._p.iter(qn("w:t"))) for p in report_builder.document.paragraphs]
+    assert "test_1 (2)" in paragraphs
+    assert "test_1" in paragraphs
+
+    allure_dir = tmp_path / "allure-results"
+    shutil.copytree(os.path.join(file_dir, "allure-results"), allure_dir)
+    result_file = allure_dir / "f2b89b2c-8237-4399-ad9c-2bf7381bc0ff-result.json"
+    result_file.write_text(result_file.read_text().replace('"name": "suite"', '"name": "parentSuite"'))
+    report_builder = ReportBuilder(allure_dir=str(allure_dir), config=config)
+    groups = report_builder.groups
+    assert groups["children"][("parentsuite", "test_1")]["total"] == 1
+    assert groups["children"][("suite", "test_1")]["total"] == 1
+    names = [group_name(group) for group, _ in list_groups(groups)]
+    assert names == ["test_1 (parentsuite)", "test_1 (suite)", "test_2"]
+    assert group_title(groups["children"][("suite", "test_1")]) == "test_1 (suite)"
+    assert "test_1 (parentsuite)" in [p.text for p in report_builder.document.paragraphs]
+
+def test_extract_text(tmp_path):
+    log_file = tmp_path / "log.txt"
+    log_file.write_text("".join(f"line {i}\n" for i in range(1000)) + "ERROR something broke\n" + "line end\n")
+
+    text = extract_text(str(log_file), head=2, tail=1, grep="ERROR", context=1)
+    lines = text.split("\n")
+    assert lines[:2] == ["line 0", "line 1"]
+    assert lines[-1] == "line end"
+    assert "line 999\nERROR something broke" in text
+    assert "line 500" not in text
+    assert "bytes skipped" in lines[2]
+
+    assert extract_text(str(log_file), head=2000, tail=0) == log_file.read_text().rstrip("\n")
+
+    long_file = tmp_path / "long.txt"
+    long_file.write_text("x" * 2000 + "\nsecond\nthird\n")
+    assert extract_text(str(long_file), head=2, tail=0, max_line_length=500).split("\n") == [
+        "x" * 500 + " [... 1500 bytes cut ...]", "second", "[... 6 bytes skipped ...]",
+    ]
+
+def test_text_attachments(tmp_path):
+    allure_dir = tmp_path / "allure-results"
+    shutil.copytree(os.path.join(file_dir, "allure-results"), allure_dir)
+    (allure_dir / "log-attachment.txt").write_text("".join(f"log line {i}\n" for i in range(100)))
+    result_file = allure_dir / "1a2ea5e0-31c1-4c67-a5fd-f13c67f68804-result.json"
+    result = json.loads(result_file.read_text())
+    result["attachments"].append({"name": "log", "source": "log-attachment.txt", "type": "text/plain"})
+    result_file.write_text(json.dumps(result))
+
+    def table_text(report_builder):
+        return "\n".join(cell.text for table in report_builder.document.tables for cell in table._cells)
+
+    config = ReportConfig()
+    config["text_attachments"]["head"] = ""
+    report_builder = ReportBuilder(allure_dir=str(allure_dir), config=config)
+    assert report_builder._get_text_attachment_config()["head"] == 20
+    text = table_text(report_builder)
+    assert "log line 0\n" in text and "log line 19\n" in text and "log line 99" in text
+    assert "log line 50" not in text
+
+    config["info"]["failed"].remove("text_attachments")
+    assert "log line" not in table_text(ReportBuilder(allure_dir=str(allure_dir), config=config))
+
+def test_streamed_images():
+    allure_dir = os.path.join(file_dir, "allure-results")
+    report_builder = ReportBuilder(allure_dir=allure_dir, config=ReportConfig())
+    os.makedirs(os.path.join(file_dir, "build"), exist_ok=True)
+    output = os.path.join(file_dir, "build/report.docx")
+    report_builder.save_report(output)
+
+    with open(os.path.join(allure_dir, "cb7c5851-146a-42d8-ad16-25726ae87771-attachment.png"), "rb") as file:
+        attachment = file.read()
+    with zipfile.ZipFile(output) as docx_file:
+        media = [docx_file.read(name) for name in docx_file.namelist() if name.startswith("word/media/")]
+    assert media.count(attachment) == 1
+
+def test_watch(tmp_path):
+    allure_dir = tmp_path / "allure-results"
+    shutil.copytree(os.path.join(file_dir, "allure-results"), allure_dir)
+    output = str(tmp_path / "report.docx")
+    watcher = ReportWatcher(allure_dir=str(allure_dir), output=output, config=ReportConfig())
+    assert watcher.ingest() == 3
+    watcher.refresh()
+    fragments = dict(watcher.fragments)
+    rows = dict(watcher.rows)
+
+    result_file = allure_dir / "1a2ea5e0-31c1-4c67-a5fd-f13c67f68804-result.json"
+    result = json.loads(result_file.read_text())
+    result.update(uuid="new-uuid", historyId="new-history-id", name="New test case")
+    (allure_dir / "new-uuid-result.json").write_text(json.dumps(result))
+    assert watcher.ingest() == 1
+    assert watcher.ingest() == 0
+    report_builder = watcher.refresh()
+
+    assert len(watcher.fragments) == 4
+    for key, fragment in fragments.items():
+        assert watcher.fragments[key] is fragment
+    headings = [p.text for p in Document(output).paragraphs if p.style.name.startswith("Heading ")]
+    assert "New test case  [ failed ]" in headings
+    assert len(report_builder.document.inline_shapes) == 3
+    assert len(watcher.rows) == 4
+    for key, row in rows.items():
+        assert watcher.rows[key] is row
+
+    config = ReportConfig()
+    config["baseline"] = str(allure_dir)
+    watcher = ReportWatcher(allure_dir=str(allure_dir), output=output, config=config)
+    watcher.ingest()
+    watcher.refresh()
+    baseline = watcher.baseline
+    assert len(baseline) == 4
+    assert watcher.refresh().changes is not None
+    assert watcher.baseline is baseline
+
+def test_server(tmp_path):
+    allure_dir = tmp_path / "allure-results"
+    shutil.copytree(os.path.join(file_dir, "allure-results"), allure_dir)
+    service = ReportService(workers=1, queue_size=1)
+    server = create_server(service, port=0, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        def render(query, data=b""):
+            with urllib.request.urlopen(urllib.request.Request(f"{url}/render?{query}", data=data)) as response:
+                return response.headers["X-Cache"], response.read()
+
+        cache, report = render(f"allure_dir={allure_dir}&config_tag=compact")
+        assert cache == "miss"
+        assert Document(io.BytesIO(report)).paragraphs
+        assert render(f"allure_dir={allure_dir}&config_tag=compact")[0] == "hit"
+
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zip_file:
+            for name in os.listdir(allure_dir):
+                zip_file.write(allure_dir / name, f"allure-results/{name}")
+        assert render("", archive.getvalue())[0] == "miss"
+        assert render("", archive.getvalue())[0] == "hit"
+
+        config_file = tmp_path / "custom.ini"
+        shutil.copy(os.path.join(file_dir, "custom.ini"), config_file)
+        assert render(f"allure_dir={allure_dir}&config_file={config_file}")[0] == "miss"
+        assert render(f"allure_dir={allure_dir}&config_file={config_file}")[0] == "hit"
+        with open(config_file, "a") as file:
+            file.write("\n; edited\n")
+        assert render(f"allure_dir={allure_dir}&config_file={config_file}")[0] == "miss"
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            render("allure_dir=.&format=rtf")
+        assert error.value.code == 400
+
+        with urllib.request.urlopen(f"{url}/metrics") as response:
+            metrics = json.loads(response.read())
+        assert metrics["completed"] == 4
+        assert metrics["cache_hits"] == 3
+        assert metrics["queue_depth"] == 0
+        assert metrics["latency"]["count"] == 4
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
+
+def test_server_concurrent_jobs(tmp_path):
+    allure_dir = tmp_path / "allure-results"
+    shutil.copytree(os.path.join(file_dir, "allure-results"), allure_dir)
+    with pytest.raises(ValueError):
+        ReportService(cache_size=0)
+
+    service = ReportService(workers=2, queue_size=8, cache_size=1)
+    try:
+        reports = {}
+
+        def render(title):
+            reports[title] = service.render(str(allure_dir), {"title": title})[0]
+
+        threads = [threading.Thread(target=render, args=(f"Title {i}",)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(reports) == 8
+        for title, report in reports.items():
+            assert title in [p.text for p in Document(io.BytesIO(report)).paragraphs]
+        assert service.metrics()["failed"] == 0
+    finally:
+        service.close()
+
+def test_cache(tmp_path, cache_dir, monkeypatch):
+    allure_dir = tmp_path / "allure-results"
+    shutil.copytree(os.path.join(file_dir, "allure-results"), allure_dir)
+    output = str(tmp_path / "report.docx")
+    runner = CliRunner()
+
+    def run(*args):
+        result = runner.invoke(commandline.main, [str(allure_dir), output, *args])
+        if result.exit_code != 0:
+            raise result.exception
+        return "taken from cache" in result.output
+
+    assert not run()
+    assert run()
+    assert not run("--no-cache")
+    assert not run("--config_tag", "compact")
+    assert run("--config_tag", "compact")
+
+    result_file = allure_dir / "1a2ea5e0-31c1-4c67-a5fd-f13c67f68804-result.json"
+    result_file.write_text(result_file.read_text().replace("Test case 3", "Test case three"))
+    assert not run()
+    assert len(os.listdir(cache_dir)) == 3
+
+    assert not run("--cache-size", "0", "--config_tag", "no_trace")
+    assert os.listdir(cache_dir) == []
+
+    pdf_file = tmp_path / "report.pdf"
+    pdf_file.write_bytes(b"pdf of an earlier run")
+    assert not run("--pdf", "--config_tag", "compact")
+    pdf_created = pdf_file.is_file()  # only if Word or soffice is available
+    assert not pdf_created or pdf_file.read_bytes() != b"pdf of an earlier run"
+    assert run("--pdf", "--config_tag", "compact") == pdf_created
+
+    def removed_by_other_process(path):
+        raise FileNotFoundError(path)
+
+    (cache_dir / "other.docx").write_bytes(b"report")
+    monkeypatch.setattr(os, "remove", removed_by_other_process)
+    OutputCache(str(cache_dir), max_size=0).evict()
+
+def test_write_zip(tmp_path):
+    xml = b"".join(b"<w:p>paragraph %d</w:p>" % i for i in range(200000))
+    image = tmp_path / "image.png"
+    image.write_bytes(os.urandom(1000))
+    output = tmp_path / "out.zip"
+
+    for compression in (0, 1, 9):
+        write_zip(output, [ZipEntry("word/document.xml", data=xml), ZipEntry("word/media/image1.png", path=image),
+                           ZipEntry("empty.xml", data=b"")], compression)
+        with zipfile.ZipFile(output) as zip_file:
+            assert zip_file.testzip() is None
+            assert zip_file.read("word/document.xml") == xml
+            assert zip_file.read("empty.xml") == b""
+            assert zip_file.getinfo("word/media/image1.png").compress_type == zipfile.ZIP_STORED
+            expected = zipfile.ZIP_STORED if compression == 0 else zipfile.ZIP_DEFLATED
+            assert zip_file.getinfo("word/document.xml").compress_type == expected
+
+def test_timing(tmp_path):
+    timing = TimingData()
+    durations = np.random.default_rng(0).exponential(1000, 1000).round()
+    durations[:3] = 0
+    for i, duration in enumerate(durations):
+        parents = [{"befores": [{"start": 0, "stop": 10}], "afters": [{"start": 0, "stop": 5}]}]
+        result = {"name": f"test {i}", "status": ["passed", "failed"][i % 2], "start": 0, "stop": duration,
+                  "parents": parents}
+        timing.add(result, f"suite {i % 3}")
+    timing.add({"name": "no times", "status": "skipped", "parents": []}, "suite 0")
+
+    analysis = timing.analyze(slowest=5, bins=10)
+    assert analysis["count"] == 1000
+    assert [d for _, _, d in analysis["slowest"]] == sorted(durations, reverse=True)[:5]
+    for key, keys in (("by_status", [["passed", "failed"][i % 2] for i in range(1000)]),
+                      ("by_suite", [f"suite {i % 3}" for i in range(1000)])):
+        names, counts, percentiles, maxima = analysis[key]
+        for name, count, values, maximum in zip(names, counts, percentiles, maxima):
+            group = durations[np.array(keys) == name]
+            assert count == len(group)
+            assert np.allclose(values, np.percentile(group, [50, 90, 95, 99]))
+            assert maximum == group.max()
+    hist_counts, edges, log_scale = analysis["histogram"]
+    assert log_scale and hist_counts.sum() == 1000
+    assert hist_counts[0] == np.count_nonzero(durations == 0) and edges[0] == 0 and len(edges) == 12
+    assert analysis["fixtures"] == {"setup": 10000, "body": durations.sum(), "teardown": 5000}
+
+    timing = TimingData()
+    session = {"uuid": "session", "befores": [{"start": 0, "stop": 60000}], "afters": []}
+    for i in range(3):
+        timing.add({"name": f"test {i}", "status": "passed", "start": 0, "stop": 1, "parents": [session]}, "suite")
+    assert timing.analyze()["fixtures"] == {"setup": 60000, "body": 3, "teardown": 0}
+
+    allure_dir = tmp_path / "allure-results"
+    shutil.copytree(os.path.join(file_dir, "allure-results"), allure_dir)
+    config = ReportConfig()
+    config["timing"].update(enabled="yes", slowest="", bins="0")
+    report_builder = ReportBuilder(allure_dir=str(allure_dir), config=config)
+    assert "Timing Analysis" in [p.text for p in report_builder.document.paragraphs]
+    assert report_builder._create_histogram(hist_counts, edges, log_scale).getvalue().startswith(b"\x89PNG")
+
+def test_compare(tmp_path):
+    baseline = {
+        "a": ["a", "passed", 100, None],
+        "b": ["b", "failed", 100, "x"],
+        "c": ["c", "failed", 100, "x"],
+        "d": ["d", "passed", 100, None],
+        "e": ["e", "passed", 100, None],
+    }
+    current = {
+        "a": ["a", "broken", 100, "y"],
+        "b": ["b", "passed", 100, None],
+        "c": ["c", "failed", 1000, "z"],
+        "d": ["d", "passed", 190, None],
+        "f": ["f", "passed", 100, None],
+    }
+    changes = compare.compare(baseline, current)
+    assert {key: [name for name, _, _ in entries] for key, entries in changes.items()} == {
+        "new_failures": ["a"], "fixed": ["b"], "changed_failures": ["c"], "added": ["f"], "removed": ["e"],
+        "regressions": ["c"],
+    }
+
+    variants = [
+        {"name": "test", "status": "passed", "historyId": str(i), "parameters": [{"name": "x", "value": str(i)}]}
+        for i in range(2)
+    ]
+    assert [entry[0] for entry in compare.index_results(variants).values()] == ["test [x=0]", "test [x=1]"]
+
+    allure_dir = tmp_path / "allure-results"
+    shutil.copytree(os.path.join(file_dir, "allure-results"), allure_dir)
+    index = compare.load_baseline(str(allure_dir))
+    assert len(index) == 3
+    assert (allure_dir / compare.INDEX_FILE).is_file()
+    assert compare.load_baseline(str(allure_dir)) == index
+    for content in ('{"version": 1, "tes', '{"version": 0, "tests": {}}', '[]'):
+        (allure_dir / compare.INDEX_FILE).write_text(content)
+        assert compare.load_baseline(str(allure_dir)) == index
+        assert compare.load_index(str(allure_dir / compare.INDEX_FILE))[0] == index
+
+    index_file = str(tmp_path / "index.json")
+    output = str(tmp_path / "report.docx")
+    runner = CliRunner()
+    result = runner.invoke(commandline.main, [str(allure_dir), output, "--save-index", index_file])
+    if result.exit_code != 0:
+        raise result.exception
+    assert compare.load_index(index_file)[0] == index
+
+    result_file = allure_dir / "5fb782a4-680e-4ce9-9e8e-b83d68f9bb20-result.json"
+    result_file.write_text(result_file.read_text().replace('"status": "passed"', '"status": "failed"', 1))
+    result = runner.invoke(commandline.main, [str(allure_dir), output, "--compare", index_file])
+    if result.exit_code != 0:
+        raise result.exception
+    texts = [p.text for p in Document(output).paragraphs]
+    assert "Changes since baseline" in texts
+    assert "New Failures" in texts
+
+def test_preview(tmp_path):
+    runner = CliRunner()
+    allure_dir = tmp_path / "allure-results"
+    shutil.copytree(os.path.join(file_dir, "allure-results"), allure_dir)
+
+    def run(output, *args):
+        result = runner.invoke(commandline.main, [str(allure_dir), str(output), "--preview", *args])
+        if result.exit_code != 0:
+            raise result.exception
+        return output.read_text(encoding="utf-8")
+
+    preview = run(tmp_path / "report.html")
+    assert preview.startswith("<!DOCTYPE html>")
+    assert "Test case 3  [ failed ]" in preview
+    assert "E       assert 42 == 43" in preview
+    attachment = "cb7c5851-146a-42d8-ad16-25726ae87771-attachment.png"
+    assert f'href="allure-results/{attachment}"' in preview
+
+    preview = run(tmp_path / "report.md", "--config_tag", "no_trace")
+    assert "### Test case 1  \\[ passed \\]" in preview
+    assert "E       assert 42 == 43" not in preview
+    assert f"{attachment})" in preview
+
+    result = runner.invoke(commandline.main, [str(allure_dir), str(tmp_path / "report.html"), "--preview", "--pdf"])
+    assert result.exit_code != 0
+
+    config = ReportConfig()
+    config["grouping"]["hierarchy"] = "suites"
+    config["baseline"] = str(allure_dir)
+    preview_builder = PreviewBuilder(allure_dir=str(allure_dir), config=config)
+    preview_builder.save_preview(str(tmp_path / "grouped.md"))
+    preview = (tmp_path / "grouped.md").read_text(encoding="utf-8")
+    assert "- [test\\_1 (2)](#group_" in preview
+    assert "New Failures: 0" in preview
+
 @pytest.fixture(autouse=True)
 def test_remove_build():
     yield